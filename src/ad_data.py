@@ -0,0 +1,113 @@
+import pandas as pd
+
+from country_code_converter import CountryCodeConverter
+
+# Value column of each hourly feed, and URL column of each URL feed, as they appear in the CSVs
+DELIVERY_VALUE_COLUMN = 'Deliveries'
+PLACEMENT_VALUE_COLUMN = 'PlacementCount'
+PUBLISHER_URL_COLUMN = 'PublisherURL'
+ADVERTISER_URL_COLUMN = 'AdvertiserURL'
+
+# Compact hourly frames replace EventHour with HourIndex, the number of whole hours since this origin
+HOUR_ORIGIN = pd.Timestamp('1970-01-01')
+
+def to_alpha_3(geo_codes):
+    lookup = {code: CountryCodeConverter([code]).convert()[0]['alpha_3'] for code in geo_codes.unique()}
+    return geo_codes.map(lookup)
+
+def prepare_hourly_data(df, value_column):
+    df = df[df['GeoCode'].notna() & (df['GeoCode'] != "")].copy()
+    df['EventHour'] = pd.to_datetime(df['EventHour'], format='%Y-%m-%d %H', errors='coerce')
+    grouped = df.groupby(['EventDate', 'EventHour', 'GeoCode'], as_index=False)[value_column].sum()
+    grouped['alpha_3'] = to_alpha_3(grouped['GeoCode'])
+    return grouped
+
+def prepare_delivery_data(df):
+    return prepare_hourly_data(df, DELIVERY_VALUE_COLUMN)
+
+def prepare_placement_data(df):
+    return prepare_hourly_data(df, PLACEMENT_VALUE_COLUMN)
+
+def prepare_url_data(df, url_column):
+    df = df[df['GeoCode'].notna() & (df['GeoCode'] != "")].copy()
+    df['alpha_3'] = to_alpha_3(df['GeoCode'])
+    grouped = df.groupby(['EventDate', url_column, 'alpha_3'], as_index=False)['Count'].sum()
+    return grouped
+
+def prepare_publisher_data(df):
+    return prepare_url_data(df, PUBLISHER_URL_COLUMN)
+
+def prepare_advertiser_data(df):
+    return prepare_url_data(df, ADVERTISER_URL_COLUMN)
+
+def to_hour_index(event_hours):
+    return ((event_hours - HOUR_ORIGIN) // pd.Timedelta(hours=1)).astype('int32')
+
+def from_hour_index(hour_index):
+    return HOUR_ORIGIN + pd.to_timedelta(hour_index, unit='h')
+
+def downcast_counts(values):
+    """Store counts in the smallest integer type that holds them. Counts with missing values are left as they are."""
+    if values.isna().any():
+        return values
+    return pd.to_numeric(values, downcast='unsigned' if (values >= 0).all() else 'integer')
+
+def compact_hourly_data(df, value_column):
+    """
+    Return a grouped hourly frame in its compact in-memory form: dictionary-encoded (categorical)
+    strings, downcast counts, and an int32 HourIndex instead of datetime64 EventHour.
+    Frames that are already compact have their categories and counts re-encoded, e.g. after a concat.
+    """
+    if 'EventHour' in df:
+        df = df[df['EventHour'].notna()]
+        hour_index = to_hour_index(df['EventHour'])
+    else:
+        hour_index = df['HourIndex'].astype('int32')
+    return pd.DataFrame({
+        'EventDate': df['EventDate'].astype('category'),
+        'HourIndex': hour_index,
+        'GeoCode': df['GeoCode'].astype('category'),
+        'alpha_3': df['alpha_3'].astype('category'),
+        value_column: downcast_counts(df[value_column]),
+    }).reset_index(drop=True)
+
+def compact_url_data(df, url_column, value_column='Count'):
+    """Return a publisher/advertiser frame with categorical strings and downcast counts."""
+    return pd.DataFrame({
+        'EventDate': df['EventDate'].astype('category'),
+        url_column: df[url_column].astype('category'),
+        'alpha_3': df['alpha_3'].astype('category'),
+        value_column: downcast_counts(df[value_column]),
+    }).reset_index(drop=True)
+
+def memory_report(structures):
+    """
+    Return the entries, bytes and bytes per entry of each named structure: DataFrames (one entry
+    per row) or the structures the dashboard serves from, which report their own `nbytes` and
+    count their entries with len() (hours for rollups, URLs for URL indexes).
+    """
+    rows = []
+    for name, structure in structures.items():
+        if isinstance(structure, pd.DataFrame):
+            nbytes = int(structure.memory_usage(deep=True).sum())
+        else:
+            nbytes = int(structure.nbytes)
+        entries = len(structure)
+        rows.append({
+            'structure': name,
+            'entries': entries,
+            'bytes': nbytes,
+            'bytes_per_entry': nbytes / entries if entries else 0.0,
+        })
+    return pd.DataFrame(rows, columns=['structure', 'entries', 'bytes', 'bytes_per_entry'])
+
+def prepare_flow_data(df):
+    # df:
+    # AdvertizerURL, PublisherURL, count
+    # Some rows have missing AdvertizerURL or PublisherURL? Filter them out:
+    df = df.dropna(subset=["PublisherURL", "count"]).copy()  # Keep only rows with PublisherURL and count
+    # If AdvertizerURL can be empty, treat them as a separate category or skip?
+    # Let's assume we keep rows only where PublisherURL is not empty. If AdvertizerURL is empty, treat as unknown:
+    # For simplicity, let's fill empty AdvertizerURL with "Unknown Advertiser"
+    df['AdvertizerURL'] = df['AdvertizerURL'].fillna("Unknown Advertiser")
+    return df
@@ -0,0 +1,231 @@
+from typing import Dict, NamedTuple, Optional, Tuple
+import sqlite3
+import time
+
+from absl import logging
+import pandas as pd
+
+from config import Config
+
+class TableSpec(NamedTuple):
+    table: str
+    # (sql column, dataframe column) pairs
+    keys: Tuple[Tuple[str, str], ...]
+    extras: Tuple[Tuple[str, str], ...]
+    value: Tuple[str, str]
+    date_column: Optional[str]
+    # Whether stored rows are also appended to a change log the dashboard follows live
+    live: bool = False
+
+HOURLY_KEYS = (("event_date", "EventDate"), ("event_hour", "EventHour"), ("geo_code", "GeoCode"))
+
+TABLES = {
+    "deliveries": TableSpec("deliveries", HOURLY_KEYS, (("alpha_3", "alpha_3"),), ("deliveries", "Deliveries"), "event_date", live=True),
+    "placements": TableSpec("placements", HOURLY_KEYS, (("alpha_3", "alpha_3"),), ("placement_count", "PlacementCount"), "event_date", live=True),
+    "publishers": TableSpec("publisher_counts", (("url", "PublisherURL"), ("alpha_3", "alpha_3"), ("event_date", "EventDate")), (), ("count", "Count"), "event_date"),
+    "advertisers": TableSpec("advertiser_counts", (("url", "AdvertiserURL"), ("alpha_3", "alpha_3"), ("event_date", "EventDate")), (), ("count", "Count"), "event_date"),
+    "flows": TableSpec("flows", (("advertiser_url", "AdvertizerURL"), ("publisher_url", "PublisherURL")), (), ("count", "count"), None),
+}
+
+HOUR_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# How long change log entries are kept for followers to catch up
+CHANGE_LOG_SECONDS = 24 * 3600
+
+class AdDataStore:
+    """
+    Responsible for the local SQLite store of ad delivery, placement, URL and flow data.
+    Rows are aggregated on write, so each table holds one row per key no matter how many
+    raw CSV rows contributed to it.
+    """
+    def __init__(self, db_path: str = Config.AD_DB_PATH):
+        self.db_path = db_path
+        self._initialize_database()
+
+    def _initialize_database(self) -> None:
+        """Create the tables and indexes if they don't exist."""
+        conn = sqlite3.connect(self.db_path)
+        # Lets the dashboard read a consistent snapshot while ingest.py keeps writing
+        conn.execute("PRAGMA journal_mode=WAL")
+        cursor = conn.cursor()
+        for spec in TABLES.values():
+            columns = ", ".join(f"{col} TEXT" for col, _ in spec.keys + spec.extras)
+            primary_key = ", ".join(col for col, _ in spec.keys)
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {spec.table} (
+                    {columns},
+                    {spec.value[0]} INTEGER,
+                    PRIMARY KEY ({primary_key})
+                )
+            """)
+            if spec.date_column:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{spec.table}_date ON {spec.table} ({spec.date_column})")
+            if spec.live:
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {spec.table}_changes (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        {columns},
+                        {spec.value[0]} INTEGER,
+                        logged_at REAL
+                    )
+                """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS table_versions (
+                kind TEXT PRIMARY KEY,
+                version INTEGER
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ingest_offsets (
+                source TEXT PRIMARY KEY,
+                byte_offset INTEGER,
+                identity TEXT
+            )
+        """)
+        # Stores created before offsets were tied to a file identity lack the column
+        if "identity" not in [row[1] for row in cursor.execute("PRAGMA table_info(ingest_offsets)")]:
+            cursor.execute("ALTER TABLE ingest_offsets ADD COLUMN identity TEXT")
+        conn.commit()
+        conn.close()
+
+    def store_rows(self, kind: str, rows: pd.DataFrame, source: Optional[str] = None, offset: Optional[int] = None,
+                   identity: Optional[str] = None) -> None:
+        """
+        Add prepared rows of the given kind to the store, summing values into existing keys, and
+        bump the version of the kind. Rows of live kinds are also appended to their change log.
+        If `source` is given, its ingest offset and the identity of the file it was reached in
+        (see CsvTailer.identity) are recorded in the same transaction, so a restarted ingest never
+        counts the same rows twice, nor resumes at that offset in a different file.
+        """
+        spec = TABLES[kind]
+        columns = spec.keys + spec.extras + (spec.value,)
+        frame = rows[[df_col for _, df_col in columns]].copy()
+        if "EventHour" in frame:
+            frame["EventHour"] = frame["EventHour"].dt.strftime(HOUR_FORMAT)
+        frame = frame.dropna(subset=[df_col for _, df_col in spec.keys])
+        frame = frame.astype(object).where(frame.notna(), None)
+        values = list(frame.itertuples(index=False, name=None))
+
+        sql_columns = ", ".join(col for col, _ in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        conflict = ", ".join(col for col, _ in spec.keys)
+        value = spec.value[0]
+
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany(f"""
+                INSERT INTO {spec.table} ({sql_columns})
+                VALUES ({placeholders})
+                ON CONFLICT ({conflict}) DO UPDATE SET {value} = {value} + excluded.{value}
+            """, values)
+            if spec.live:
+                now = time.time()
+                conn.executemany(f"""
+                    INSERT INTO {spec.table}_changes ({sql_columns}, logged_at)
+                    VALUES ({placeholders}, ?)
+                """, (row + (now,) for row in values))
+                conn.execute(f"DELETE FROM {spec.table}_changes WHERE logged_at < ?", (now - CHANGE_LOG_SECONDS,))
+            conn.execute("""
+                INSERT INTO table_versions (kind, version) VALUES (?, 1)
+                ON CONFLICT (kind) DO UPDATE SET version = version + 1
+            """, (kind,))
+            if source is not None:
+                conn.execute("""
+                    INSERT OR REPLACE INTO ingest_offsets (source, byte_offset, identity) VALUES (?, ?, ?)
+                """, (source, offset, identity))
+        conn.close()
+
+    def get_position(self, source: str) -> Tuple[int, Optional[str]]:
+        """Return how many bytes of the given source file have been ingested, and the identity of that file."""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("SELECT byte_offset, identity FROM ingest_offsets WHERE source = ?", (source,)).fetchone()
+        conn.close()
+        return (row[0], row[1]) if row else (0, None)
+
+    def get_versions(self) -> Dict[str, int]:
+        """Return the version of each kind, which changes whenever rows of that kind are stored."""
+        conn = sqlite3.connect(self.db_path)
+        versions = dict(conn.execute("SELECT kind, version FROM table_versions").fetchall())
+        conn.close()
+        return versions
+
+    def has_data(self, kind: str) -> bool:
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(f"SELECT 1 FROM {TABLES[kind].table} LIMIT 1").fetchone()
+        conn.close()
+        return row is not None
+
+    def _columns(self, kind: str) -> str:
+        spec = TABLES[kind]
+        return ", ".join(f'{col} AS "{df_col}"' for col, df_col in spec.keys + spec.extras + (spec.value,))
+
+    def _read(self, conn: sqlite3.Connection, query: str, params: tuple = ()) -> pd.DataFrame:
+        df = pd.read_sql_query(query, conn, params=params)
+        if "EventHour" in df:
+            df["EventHour"] = pd.to_datetime(df["EventHour"], format=HOUR_FORMAT)
+        return df
+
+    def _window_query(self, kind: str, days: Optional[int]) -> Tuple[str, tuple]:
+        spec = TABLES[kind]
+        query = f"SELECT {self._columns(kind)} FROM {spec.table}"
+        if days is None or not spec.date_column:
+            return query, ()
+        query += f"""
+            WHERE {spec.date_column} > (SELECT date(MAX({spec.date_column}), ?) FROM {spec.table})
+        """
+        return query, (f"-{days} days",)
+
+    def load(self, kind: str, days: Optional[int] = None) -> pd.DataFrame:
+        """
+        Load the aggregated rows of the given kind in the same shape the dashboard builds from the CSVs.
+        If `days` is given, only the latest `days` dates are loaded.
+        """
+        conn = sqlite3.connect(self.db_path)
+        df = self._read(conn, *self._window_query(kind, days))
+        conn.close()
+        return df
+
+    def load_live(self, kind: str, days: Optional[int] = None) -> Tuple[pd.DataFrame, int]:
+        """
+        Like `load`, for live kinds, but also return the position in the change log the loaded rows
+        include, read in the same transaction so following the log from there counts every row once.
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("BEGIN")
+        df = self._read(conn, *self._window_query(kind, days))
+        seq = conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {TABLES[kind].table}_changes").fetchone()[0]
+        conn.execute("COMMIT")
+        conn.close()
+        return df, seq
+
+    def changes_since(self, kind: str, seq: int) -> Tuple[pd.DataFrame, int]:
+        """Return the rows of a live kind logged after position `seq`, and the position they reach."""
+        table = f"{TABLES[kind].table}_changes"
+        conn = sqlite3.connect(self.db_path)
+        first = conn.execute(f"SELECT MIN(seq) FROM {table}").fetchone()[0]
+        if first is not None and first > seq + 1:
+            logging.warning(f"The {kind} change log was pruned past position {seq}. Some rows will be missing until the next rebuild.")
+        df = self._read(conn, f"SELECT seq, {self._columns(kind)} FROM {table} WHERE seq > ? ORDER BY seq", (seq,))
+        conn.close()
+        if not df.empty:
+            seq = int(df["seq"].iloc[-1])
+        return df.drop(columns="seq"), seq
+
+
+class StoreTailer:
+    """
+    Follows the change log of a live kind in the ad store, like CsvTailer follows a CSV. The rows it
+    returns are already aggregated into the shape the hourly feeds hold.
+    """
+    def __init__(self, store: AdDataStore, kind: str, seq: int = 0):
+        self.store = store
+        self.kind = kind
+        self._seq = seq
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def poll(self) -> Optional[pd.DataFrame]:
+        rows, self._seq = self.store.changes_since(self.kind, self._seq)
+        return rows if not rows.empty else None
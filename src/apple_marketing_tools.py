@@ -1,6 +1,5 @@
 from typing import List
 from datetime import datetime
-import requests
 
 from app_entry import AppEntry
 from config import Config
@@ -17,6 +16,9 @@ class AppStoreAPIClient:
         Fetch top apps from the Apple RSS API for a given country and chart type.
         Returns a list of AppEntry (without fetched_date, country, chart_type filled yet).
         """
+        # Imported on first fetch: runs that find every chart up to date never need it
+        import requests
+
         url = f"{self.BASE_URL}/{country}/apps/{chart_type}/{limit}/{allow_explicit}.json"
         response = requests.get(url)
         response.raise_for_status()
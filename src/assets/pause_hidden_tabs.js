@@ -0,0 +1,7 @@
+// Stop the dashboard's tick timer while the tab is hidden, so background tabs make no requests,
+// and resume it as soon as the tab is shown again.
+document.addEventListener('visibilitychange', function () {
+    if (window.dash_clientside && window.dash_clientside.set_props) {
+        window.dash_clientside.set_props('tick', {disabled: document.hidden});
+    }
+});
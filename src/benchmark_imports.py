@@ -0,0 +1,59 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+
+FLAGS = flags.FLAGS
+flags.DEFINE_list("modules", ["update", "ingest", "database_manager", "util"], "Entry-point modules to time.")
+flags.DEFINE_integer("runs", 5, "Fresh interpreters started per module.")
+flags.DEFINE_integer("top", 5, "Number of heaviest imports listed per module.")
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def parse_importtime(stderr, module):
+    """
+    Return (cumulative ms of `module`, {direct import of `module`: cumulative ms})
+    from `python -X importtime` output.
+    """
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Imports are listed after the ones they pulled in, indented two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            if name.strip() == module:
+                return int(cumulative) / 1000, children
+            children = {}
+    return 0.0, {}
+
+def time_import(module):
+    """Import `module` in a fresh interpreter. Returns (wall ms, import ms, {direct import: cumulative ms})."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=SRC_DIR, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return (wall_ms, *parse_importtime(result.stderr, module))
+
+def main(argv):
+    for module in FLAGS.modules:
+        runs = [time_import(module) for _ in range(FLAGS.runs)]
+        wall_ms = statistics.median(run[0] for run in runs)
+        import_ms = statistics.median(run[1] for run in runs)
+        logging.info(f"{module}: {wall_ms:.0f} ms cold start, {import_ms:.0f} ms importing it (median of {FLAGS.runs})")
+        heaviest = sorted(runs[-1][2].items(), key=lambda item: -item[1])[:FLAGS.top]
+        for name, ms in heaviest:
+            logging.info(f"    {name:<30} {ms:8.1f} ms")
+
+if __name__ == "__main__":
+    app.run(main)
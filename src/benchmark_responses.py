@@ -0,0 +1,116 @@
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import plotly.io as pio
+
+FLAGS = flags.FLAGS
+flags.DEFINE_integer("requests", 50, "Number of requests sent to each callback per configuration.")
+
+# (name, JSON engine, typed arrays, Accept-Encoding)
+CONFIGURATIONS = [
+    ("before", "json", False, "identity"),
+    ("orjson", "orjson", True, "identity"),
+    ("orjson+gzip", "orjson", True, "gzip"),
+    ("orjson+br", "orjson", True, "br"),
+]
+
+def parse_outputs(output):
+    """Split a callback_map key into its (id, property) outputs."""
+    if output.startswith(".."):
+        parts = output[2:-2].split("...")
+    else:
+        parts = [output]
+    return [dict(zip(("id", "property"), part.rsplit(".", 1))) for part in parts]
+
+def layout_values(layout):
+    """Return the initial value of every (component id, property) in a /_dash-layout JSON tree."""
+    values = {}
+    nodes = [layout]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, list):
+            nodes.extend(node)
+            continue
+        if not isinstance(node, dict) or "props" not in node:
+            continue
+        props = node["props"]
+        if "id" in props:
+            for prop, value in props.items():
+                values[(props["id"], prop)] = value
+        nodes.extend(value for value in props.values() if isinstance(value, (list, dict)))
+    return values
+
+def callback_body(output, spec, n, values=None):
+    """
+    Build the body the Dash renderer posts to /_dash-update-component when an interval ticks to `n`.
+    `spec` is the callback's entry in callback_map or /_dash-dependencies. Other inputs and state
+    take their value from `values` (see layout_values), or None.
+    """
+    outputs = parse_outputs(output)
+    values = values or {}
+
+    def with_value(item):
+        if item["property"] == "n_intervals":
+            return dict(item, value=n)
+        return dict(item, value=values.get((item["id"], item["property"])))
+
+    return {
+        "output": output,
+        "outputs": outputs if output.startswith("..") else outputs[0],
+        "inputs": [with_value(item) for item in spec["inputs"]],
+        "changedPropIds": [f"{item['id']}.{item['property']}" for item in spec["inputs"] if item["property"] == "n_intervals"],
+        "state": [with_value(item) for item in spec.get("state", [])],
+    }
+
+def callback_request(dash_app, output, n, values=None):
+    """Build the /_dash-update-component body for a callback of `dash_app` (see callback_body)."""
+    return callback_body(output, dash_app.callback_map[output], n, values)
+
+def is_interval_callback(spec):
+    return any(item["property"] == "n_intervals" for item in spec["inputs"])
+
+def interval_callbacks(dash_app):
+    """Return the callback_map keys of all callbacks driven by a dcc.Interval."""
+    return [output for output, spec in dash_app.callback_map.items() if is_interval_callback(spec)]
+
+def measure(client, body, encoding, requests):
+    """Return (mean bytes, mean ms) per response for `requests` posts of `body`."""
+    total_bytes = 0
+    start = time.perf_counter()
+    for n in range(requests):
+        body["inputs"] = [dict(item, value=n) if item["property"] == "n_intervals" else item for item in body["inputs"]]
+        response = client.post("/_dash-update-component", json=body, headers={"Accept-Encoding": encoding})
+        # 204 is a callback that raised PreventUpdate
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"{body['output']} returned {response.status_code}")
+        total_bytes += len(response.data)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return total_bytes / requests, elapsed_ms / requests
+
+def main(argv):
+    import launch
+
+    client = launch.dash_app.server.test_client()
+    client.get("/")
+
+    values = layout_values(client.get("/_dash-layout").get_json())
+    results = {}
+    for name, engine, typed_arrays, encoding in CONFIGURATIONS:
+        pio.json.config.default_engine = engine
+        launch.choropleth_factory.typed_arrays = typed_arrays
+        for output in interval_callbacks(launch.dash_app):
+            body = callback_request(launch.dash_app, output, 0, values)
+            results[(name, output)] = measure(client, body, encoding, FLAGS.requests)
+        layout = client.get("/_dash-layout", headers={"Accept-Encoding": encoding})
+        results[(name, "layout")] = (len(layout.data), None)
+
+    logging.info(f"{'configuration':<14} | {'response':<40} | {'bytes':>10} | {'ms':>8}")
+    logging.info("-" * 82)
+    for (name, output), (size, ms) in results.items():
+        ms_text = f"{ms:8.2f}" if ms is not None else f"{'-':>8}"
+        logging.info(f"{name:<14} | {output[:40]:<40} | {size:10.0f} | {ms_text}")
+
+if __name__ == "__main__":
+    app.run(main)
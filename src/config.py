@@ -6,6 +6,21 @@ class Config:
     ALLOW_EXPLICIT = "apps"
     DATE_FORMAT = "%Y-%m-%d"
 
+    # Local store for the ad datasets, filled from the CSVs below by ingest.py
+    AD_DB_PATH = "ad_data.db"
+    CSV_PATH_DELIVERIES = "/Users/xlu/Downloads/delivery_data.csv"
+    CSV_PATH_PLACEMENTS = "/Users/xlu/Downloads/placement_data.csv"
+    CSV_PATH_PUBLISHER = "/Users/xlu/Downloads/publisher_data.csv"
+    CSV_PATH_ADVERTISER = "/Users/xlu/Downloads/advertiser_data.csv"
+    CSV_PATH_FLOW = "/Users/xlu/Downloads/flow_data.csv"
+
+    # On-disk cache of app icon thumbnails served by the dashboard, and their size in pixels
+    ICON_CACHE_DIR = "icon_cache"
+    ICON_SIZE = 100
+
+    # Maximum number of query results DatabaseManager keeps in its cache (0 disables it)
+    QUERY_CACHE_SIZE = 4096
+
     # Define the countries you want to visualize.
     # You should use valid two-letter country codes supported by the API.
     # See: https://developer.apple.com/library/archive/documentation/LanguagesUtilities/Conceptual/iTunesConnect_Guide/Appendices/AppStoreTerritories.html for reference.
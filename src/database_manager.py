@@ -1,18 +1,55 @@
+import copy
 from datetime import datetime
-from typing import List, Optional
-import pandas as pd
+import functools
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 import sqlite3
+import threading
+import time
 
 from app_entry import AppEntry
 from config import Config
+from query_cache import MISS, QueryCache
+
+# pandas is only needed by the dashboard queries; importing it lazily keeps update.py fast to start
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Limits the latest-chart queries to dates whose update run has been published, so they never read a
+# day update.py is still writing. Databases that were never published to are not limited.
+PUBLISHED = "fetched_date <= COALESCE((SELECT published_date FROM data_version WHERE id = 0), fetched_date)"
+
+def cached_query(method):
+    """
+    Serve a read-only query from the DatabaseManager's result cache, keyed on the method and
+    its arguments and valid for as long as the data version it was read at.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._cache is None:
+            return method(self, *args, **kwargs)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        version = self.get_data_version()
+        value = self._cache.get(key, version)
+        if value is MISS:
+            value = method(self, *args, **kwargs)
+            self._cache.put(key, version, value)
+        # Callers get their own copy, so mutating a result can't corrupt the cache.
+        return copy.copy(value)
+    return wrapper
 
 class DatabaseManager:
     """
     Responsible for all database interactions.
     Implements a repository-like pattern for AppEntry.
     """
-    def __init__(self, db_path: str = Config.DB_PATH):
+    # Seconds a connection waits for another process's write lock before failing
+    BUSY_TIMEOUT = 30
+
+    def __init__(self, db_path: str = Config.DB_PATH, cache_size: int = Config.QUERY_CACHE_SIZE):
         self.db_path = db_path
+        self._cache = QueryCache(cache_size) if cache_size else None
+        self._local = threading.local()
         self._initialize_database()
 
     def _initialize_database(self) -> None:
@@ -31,6 +68,36 @@ class DatabaseManager:
                 PRIMARY KEY (country, chart_type, rank, fetched_date)
             )
         """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS data_version (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                version INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (0, 0)")
+        # Databases created before update runs were published lack the published columns
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(data_version)")]
+        if "published" not in columns:
+            cursor.execute("ALTER TABLE data_version ADD COLUMN published INTEGER")
+            cursor.execute("ALTER TABLE data_version ADD COLUMN published_date TEXT")
+            cursor.execute("UPDATE data_version SET published = version")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS update_jobs (
+                job_date TEXT,
+                country TEXT,
+                chart_type TEXT,
+                status TEXT,
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER DEFAULT 0,
+                not_before REAL,
+                PRIMARY KEY (job_date, country, chart_type)
+            )
+        """)
+        # Journals created before retries were delayed lack the not_before column
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(update_jobs)")]
+        if "not_before" not in columns:
+            cursor.execute("ALTER TABLE update_jobs ADD COLUMN not_before REAL")
         conn.commit()
         conn.close()
 
@@ -39,16 +106,174 @@ class DatabaseManager:
         if not entries:
             return
 
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT)
         cursor = conn.cursor()
         for entry in entries:
             cursor.execute("""
                 INSERT OR REPLACE INTO top_apps (country, chart_type, rank, app_name, artist, icon_url, fetched_date)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (entry.country, entry.chart_type, entry.rank, entry.app_name, entry.artist, entry.icon_url, entry.fetched_date))
+        cursor.execute("UPDATE data_version SET version = version + 1 WHERE id = 0")
         conn.commit()
         conn.close()
+
+    def get_data_version(self) -> int:
+        """
+        Return a counter that store_apps bumps in the same transaction as every write,
+        so readers in any process can tell whether top_apps has changed.
+        """
+        return self._read_versions()[0]
+
+    def get_published_version(self) -> int:
+        """
+        Return the data version of the last completed update run (see publish_update). Unlike
+        get_data_version, it doesn't change while a run is still writing its day.
+        """
+        return self._read_versions()[1]
+
+    def _read_versions(self) -> Tuple[int, int]:
+        """
+        Return the data and published versions.
+        Each thread keeps a connection open and only re-reads them when SQLite's
+        PRAGMA data_version reports a commit from another connection, so polling them is cheap.
+        """
+        local = self._local
+        # SQLite connections must not be used across fork(), so a forked child
+        # (e.g. a startup loader process) opens its own instead of the one it inherited.
+        if getattr(local, "conn", None) is None or local.pid != os.getpid():
+            local.conn = sqlite3.connect(self.db_path)
+            local.pid = os.getpid()
+            local.commits = None
+        commits = local.conn.execute("PRAGMA data_version").fetchone()[0]
+        if commits != local.commits:
+            row = local.conn.execute("SELECT version, published FROM data_version WHERE id = 0").fetchone()
+            local.versions = (row[0], row[1]) if row else (0, 0)
+            local.commits = commits
+        return local.versions
     
+    def create_update_jobs(self, job_date: str, jobs: List[Tuple[str, str]]) -> None:
+        """
+        Add a pending journal entry for every (country, chart_type) of `job_date` that doesn't have one yet.
+        Entries that failed in an earlier run are reset to pending with fresh attempts, so rerunning
+        the update retries them.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT)
+        conn.executemany("""
+            INSERT OR IGNORE INTO update_jobs (job_date, country, chart_type, status, attempts)
+            VALUES (?, ?, ?, 'pending', 0)
+        """, [(job_date, country, chart_type) for country, chart_type in jobs])
+        conn.execute("""
+            UPDATE update_jobs
+            SET status = 'pending', attempts = 0, not_before = NULL
+            WHERE job_date = ? AND status = 'failed'
+        """, (job_date,))
+        conn.commit()
+        conn.close()
+
+    def claim_update_job(self, job_date: str, owner: str, lease_seconds: float, max_attempts: int = 3) -> Optional[Tuple[str, str]]:
+        """
+        Atomically lease the next pending (country, chart_type) of `job_date` to `owner`.
+        Jobs whose lease expired, because their worker died, are handed out again, or marked
+        failed if that was their last attempt. Jobs waiting out a retry delay are skipped.
+        Returns None when there is nothing to claim right now.
+        """
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT, isolation_level=None)
+        try:
+            # IMMEDIATE takes the write lock up front, so two workers can't pick the same row.
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                UPDATE update_jobs
+                SET status = 'failed', lease_owner = NULL, lease_expires = NULL
+                WHERE job_date = ? AND status = 'running' AND lease_expires < ? AND attempts >= ?
+            """, (job_date, now, max_attempts))
+            row = conn.execute("""
+                SELECT country, chart_type
+                FROM update_jobs
+                WHERE job_date = ?
+                AND (status = 'pending' OR (status = 'running' AND lease_expires < ?))
+                AND attempts < ?
+                AND (not_before IS NULL OR not_before <= ?)
+                ORDER BY country, chart_type
+                LIMIT 1
+            """, (job_date, now, max_attempts, now)).fetchone()
+            if row is not None:
+                conn.execute("""
+                    UPDATE update_jobs
+                    SET status = 'running', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                    WHERE job_date = ? AND country = ? AND chart_type = ?
+                """, (owner, now + lease_seconds, job_date, row[0], row[1]))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return (row[0], row[1]) if row else None
+
+    def next_update_retry(self, job_date: str, max_attempts: int = 3) -> Optional[float]:
+        """Return the earliest time a pending job of `job_date` may be retried, or None if no job is waiting to be."""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("""
+            SELECT MIN(not_before) FROM update_jobs
+            WHERE job_date = ? AND status = 'pending' AND attempts < ? AND not_before IS NOT NULL
+        """, (job_date, max_attempts)).fetchone()
+        conn.close()
+        return row[0]
+
+    def finish_update_job(self, job_date: str, country: str, chart_type: str, owner: str,
+                          succeeded: bool, max_attempts: int = 3, retry_seconds: float = 60) -> None:
+        """
+        Record the outcome of a leased job. Failed jobs go back to pending until they have used up
+        `max_attempts`, and may only be claimed again after `retry_seconds` times the attempts made.
+        Outcomes from workers that lost their lease are ignored.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT)
+        conn.execute("""
+            UPDATE update_jobs
+            SET status = CASE WHEN ? THEN 'done' WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                not_before = CASE WHEN ? THEN NULL ELSE ? + ? * attempts END,
+                lease_owner = NULL,
+                lease_expires = NULL
+            WHERE job_date = ? AND country = ? AND chart_type = ? AND lease_owner = ?
+        """, (succeeded, max_attempts, succeeded, time.time(), retry_seconds, job_date, country, chart_type, owner))
+        conn.commit()
+        conn.close()
+
+    def publish_update(self, job_date: str) -> bool:
+        """
+        Publish the data stored by the run of `job_date` once none of its jobs is pending or running,
+        making its latest charts visible to the dashboard. Returns whether the run is complete.
+        Publishing bumps the data version, so cached results of the previous published date are dropped.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            unfinished = conn.execute("""
+                SELECT COUNT(*) FROM update_jobs WHERE job_date = ? AND status IN ('pending', 'running')
+            """, (job_date,)).fetchone()[0]
+            if not unfinished:
+                # The run's charts may be dated after job_date if it ran past midnight
+                conn.execute("""
+                    UPDATE data_version
+                    SET version = version + 1,
+                        published = version + 1,
+                        published_date = (SELECT MAX(fetched_date) FROM top_apps)
+                    WHERE id = 0
+                    AND (published IS NOT version
+                         OR published_date IS NOT (SELECT MAX(fetched_date) FROM top_apps))
+                """)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return not unfinished
+
+    def get_update_progress(self, job_date: str) -> Dict[str, int]:
+        """Return the number of journal entries of `job_date` per status."""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("""
+            SELECT status, COUNT(*) FROM update_jobs WHERE job_date = ? GROUP BY status
+        """, (job_date,)).fetchall()
+        conn.close()
+        return dict(rows)
+
     def has_data_for_today(self, country: str, chart_type: str) -> bool:
         """Check if today's data for the given country and chart_type is already stored."""
         today_str = datetime.utcnow().strftime(Config.DATE_FORMAT)
@@ -113,17 +338,20 @@ class DatabaseManager:
         ]
         return entries
     
+    @cached_query
     def fetch_apps_name_from_all_countries(self, chart_type: Optional[str] = None, limit=Config.LIMIT):
         """
         Get a list of distinct apps that appear in the top `limit` of `chart_type` apps
         for the latest fetched_date in the database.
         """
+        import pandas as pd
+
         conn = sqlite3.connect(self.db_path)
         query = f"""
             WITH latest AS (
                 SELECT MAX(fetched_date) AS max_date
                 FROM top_apps
-                WHERE chart_type = ?
+                WHERE chart_type = ? AND {PUBLISHED}
             )
             SELECT DISTINCT app_name
             FROM top_apps
@@ -136,10 +364,13 @@ class DatabaseManager:
         conn.close()
         return apps['app_name'].tolist()
 
+    @cached_query
     def get_countries_for_app(self, app_name, chart_type: Optional[str] = None, limit=Config.LIMIT):
         """
         Given an app_name, return all countries where this app is in the top `limit` free apps.
         """
+        import pandas as pd
+
         conn = sqlite3.connect(self.db_path)
         query = f"""
             SELECT DISTINCT country
@@ -152,16 +383,56 @@ class DatabaseManager:
         conn.close()
         return countries['country'].tolist()
     
+    def fetch_latest_icon_urls(self) -> List[str]:
+        """Return the distinct icon_urls of every chart_type's latest fetched_date."""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(f"""
+            WITH latest AS (
+                SELECT chart_type, MAX(fetched_date) AS max_date
+                FROM top_apps
+                WHERE {PUBLISHED}
+                GROUP BY chart_type
+            )
+            SELECT DISTINCT icon_url FROM top_apps
+            JOIN latest ON top_apps.chart_type = latest.chart_type AND top_apps.fetched_date = latest.max_date
+            WHERE icon_url IS NOT NULL AND icon_url != ''
+        """).fetchall()
+        conn.close()
+        return [r[0] for r in rows]
+
+    def fetch_chart_memberships(self, chart_type: str, limit=Config.LIMIT, latest_only: bool = True) -> "pd.DataFrame":
+        """
+        Return every (app_name, country, fetched_date) row of `chart_type` within the top `limit`,
+        either for the latest fetched_date only or for all dates.
+        """
+        import pandas as pd
+
+        conn = sqlite3.connect(self.db_path)
+        query = """
+            SELECT app_name, country, fetched_date
+            FROM top_apps
+            WHERE chart_type = ?
+            AND rank <= ?
+        """
+        params = (chart_type, limit)
+        if latest_only:
+            query += f" AND fetched_date = (SELECT MAX(fetched_date) FROM top_apps WHERE chart_type = ? AND {PUBLISHED})"
+            params += (chart_type,)
+        rows = pd.read_sql_query(query, conn, params=params)
+        conn.close()
+        return rows
+
+    @cached_query
     def get_app_icon(self, chart_type, app_name):
         """
         Retrieve the icon_url for the given app from the database for the given chart_type.
         """
         conn = sqlite3.connect(self.db_path)
-        query = """
+        query = f"""
             WITH latest AS (
                 SELECT MAX(fetched_date) AS max_date
                 FROM top_apps
-                WHERE chart_type = ?
+                WHERE chart_type = ? AND {PUBLISHED}
             )
             SELECT icon_url FROM top_apps
             JOIN latest ON top_apps.fetched_date = latest.max_date
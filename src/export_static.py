@@ -0,0 +1,212 @@
+import mimetypes
+import os
+import shutil
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import plotly
+import plotly.io as pio
+
+FLAGS = flags.FLAGS
+flags.DEFINE_string("output_dir", "static_export", "Directory the static bundle is written to.")
+flags.DEFINE_integer("max_urls", None, "Export at most this many of the top PublisherURLs/AdvertiserURLs. Defaults to all.")
+
+# The page of the bundle. It plays every cycle from the per-frame files under data/ on the same
+# cadence as the live dashboard, and stops while the tab is hidden.
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>App Show</title>
+<script src="plotly.min.js"></script>
+<style>
+  body { font-family: sans-serif; margin: 0 2rem; }
+  h1 { text-align: center; margin: 1.5rem 0; }
+  .row { display: flex; gap: 2rem; }
+  .col { flex: 1; min-width: 0; }
+  .info { text-align: center; margin: 1rem 0; }
+  .icon { height: 100px; }
+</style>
+</head>
+<body>
+<h1>Top-50 Apps by Territory (Free vs Paid)</h1>
+<div class="row">
+  <div class="col">
+    <h3>Top-Free Apps</h3>
+    <div id="apps-free-info" class="info"></div>
+    <img id="apps-free-icon" class="icon" alt="" hidden>
+    <div id="apps-free-map"></div>
+    <div id="histogram-free"></div>
+  </div>
+  <div class="col">
+    <h3>Top-Paid Apps</h3>
+    <div id="apps-paid-info" class="info"></div>
+    <img id="apps-paid-icon" class="icon" alt="" hidden>
+    <div id="apps-paid-map"></div>
+    <div id="histogram-paid"></div>
+  </div>
+</div>
+<hr>
+<h1>Worldwide Ad Deliveries and Placements Over Time</h1>
+<div class="row">
+  <div class="col"><h3>Deliveries</h3><div id="delivery-map"></div><div id="delivery-info" class="info"></div></div>
+  <div class="col"><h3>Placements</h3><div id="placement-map"></div><div id="placement-info" class="info"></div></div>
+</div>
+<hr>
+<h1>Counts by PublisherURL and AdvertiserURL</h1>
+<div class="row">
+  <div class="col"><h3>PublisherURL</h3><div id="url-map"></div><div id="url-info" class="info"></div></div>
+  <div class="col"><h3>AdvertiserURL</h3><div id="advertiser-map"></div><div id="advertiser-info" class="info"></div></div>
+</div>
+<hr>
+<h1>Advertiser to Publisher Flow (Sankey)</h1>
+<div id="flow-sankey"></div>
+<script>
+const getJSON = (path) => fetch(path).then((response) => response.json());
+const layouts = {};
+
+async function show(name, index) {
+  if (!(name in layouts)) {
+    layouts[name] = getJSON(`data/${name}/layout.json`);
+  }
+  const [base, frame] = await Promise.all([layouts[name], getJSON(`data/${name}/${index}.json`)]);
+  Plotly.react(`${name}-map`, frame.data, Object.assign({}, base, frame.layout));
+  document.getElementById(`${name}-info`).textContent = frame.info;
+  const icon = document.getElementById(`${name}-icon`);
+  if (icon) {
+    icon.hidden = !frame.icon;
+    if (frame.icon) icon.src = frame.icon;
+  }
+}
+
+getJSON("data/manifest.json").then((manifest) => {
+  for (const name of manifest.figures) {
+    getJSON(`data/figures/${name}.json`).then((figure) => Plotly.newPlot(name, figure.data, figure.layout));
+  }
+  let n = 0;
+  const tick = () => {
+    if (document.hidden) return;
+    for (const [name, cycle] of Object.entries(manifest.cycles)) {
+      const ticks = Math.max(Math.round(cycle.interval_ms / manifest.tick_ms), 1);
+      if (n % ticks === 0) show(name, Math.floor(n / ticks) % cycle.frames);
+    }
+    n += 1;
+  };
+  tick();
+  setInterval(tick, manifest.tick_ms);
+});
+</script>
+</body>
+</html>
+"""
+
+def layout_diff(base, layout):
+    """Return the layout keys whose value differs from `base`, with keys missing from `layout` set to None."""
+    diff = {key: value for key, value in layout.items() if base.get(key) is not value and base.get(key) != value}
+    diff.update((key, None) for key in base if key not in layout)
+    return diff
+
+class BundleWriter:
+    """
+    Writes the static bundle: each cycle's shared layout once, then one compact file per frame
+    holding only its traces, the layout keys that differ from the shared one, its info text
+    and icon. Icons are copied from the icon cache under their content hash.
+    """
+    def __init__(self, output_dir, icon_cache):
+        self.output_dir = output_dir
+        self.icon_cache = icon_cache
+        self.bytes_written = 0
+        self._icons = {}
+
+    def write(self, path, text):
+        path = os.path.join(self.output_dir, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = text.encode("utf-8") if isinstance(text, str) else text
+        with open(path, "wb") as f:
+            f.write(data)
+        self.bytes_written += len(data)
+
+    def write_json(self, path, obj):
+        self.write(path, pio.json.to_json_plotly(obj))
+
+    def icon(self, src):
+        """Copy the icon behind a dashboard /icons/<key> src into the bundle and return its relative path."""
+        if not src:
+            return ""
+        if src not in self._icons:
+            path = ""
+            try:
+                cached = self.icon_cache.get(src.rsplit("/", 1)[-1])
+            except Exception as e:
+                logging.warning(f"Failed to fetch icon {src}: {e}")
+                cached = None
+            if cached is not None:
+                data, mimetype, etag = cached
+                path = f"icons/{etag}{mimetypes.guess_extension(mimetype) or ''}"
+                self.write(path, data)
+            self._icons[src] = path
+        return self._icons[src]
+
+    def cycle(self, name, frames, interval_ms):
+        """Write the (figure, info[, icon src]) frames of one cycle. Returns its manifest entry."""
+        base = None
+        count = 0
+        for count, (fig, info, *icon) in enumerate(frames, start=1):
+            layout = fig["layout"]
+            if base is None:
+                base = layout
+                self.write_json(f"data/{name}/layout.json", base)
+            self.write_json(f"data/{name}/{count - 1}.json", {
+                "data": fig["data"],
+                "layout": layout_diff(base, layout),
+                "info": info,
+                "icon": self.icon(icon[0]) if icon else "",
+            })
+        return {"frames": count, "interval_ms": interval_ms}
+
+def main(argv):
+    import launch
+
+    start = time.perf_counter()
+    shutil.rmtree(os.path.join(FLAGS.output_dir, "data"), ignore_errors=True)
+    writer = BundleWriter(FLAGS.output_dir, launch.icon_cache)
+    snapshot = launch.snapshots.current()
+    intervals = launch.SECTION_INTERVALS_MS
+
+    def url_count(index):
+        return len(index) if FLAGS.max_urls is None else min(len(index), FLAGS.max_urls)
+
+    cycles = {
+        "apps-free": ("apps", max(len(snapshot.all_apps_free), 1),
+                      lambda n: launch.app_frame(launch.CHART_TYPE_FREE, snapshot.all_apps_free, snapshot.territory_counts_df_free, n)),
+        "apps-paid": ("apps", max(len(snapshot.all_apps_paid), 1),
+                      lambda n: launch.app_frame(launch.CHART_TYPE_PAID, snapshot.all_apps_paid, snapshot.territory_counts_df_paid, n)),
+        "delivery": ("delivery", max(len(snapshot.delivery_feed.snapshot().rollups.buckets('hour')), 1), launch.update_delivery_map),
+        "placement": ("placement", max(len(snapshot.placement_feed.snapshot().rollups.buckets('hour')), 1), launch.update_placement_map),
+        "url": ("url", max(url_count(snapshot.publisher_index), 1), launch.update_url_map),
+        "advertiser": ("advertiser", max(url_count(snapshot.advertiser_index), 1), launch.update_advertiser_map),
+    }
+
+    manifest = {"tick_ms": launch.TICK_MS, "cycles": {}, "figures": []}
+    for name, (section, frames, render) in cycles.items():
+        written = writer.bytes_written
+        manifest["cycles"][name] = writer.cycle(name, (render(n) for n in range(frames)), intervals[section])
+        logging.info(f"{name}: {frames} frames, {(writer.bytes_written - written) / 1024:.0f} KiB")
+
+    for name, fig in (("histogram-free", snapshot.histogram_free_fig),
+                      ("histogram-paid", snapshot.histogram_paid_fig),
+                      ("flow-sankey", snapshot.sankey_fig)):
+        writer.write_json(f"data/figures/{name}.json", fig.to_plotly_json())
+        manifest["figures"].append(name)
+
+    writer.write_json("data/manifest.json", manifest)
+    writer.write("index.html", INDEX_HTML)
+    shutil.copyfile(os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js"),
+                    os.path.join(FLAGS.output_dir, "plotly.min.js"))
+    logging.info(f"Exported the dashboard to {FLAGS.output_dir} "
+                 f"({writer.bytes_written / 1024 / 1024:.1f} MiB of data) in {time.perf_counter() - start:.1f}s.")
+
+if __name__ == "__main__":
+    app.run(main)
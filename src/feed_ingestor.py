@@ -0,0 +1,237 @@
+import hashlib
+import io
+import os
+import threading
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from absl import logging
+import pandas as pd
+
+from ad_data import compact_hourly_data
+from rollups import Rollups
+
+
+class CsvTailer:
+    """
+    Follows a CSV file and returns the rows appended since the previous poll.
+    Only complete lines are consumed, so a writer caught mid-row is picked up on the next poll.
+    A file that is replaced (a new inode) or truncated is re-read from its header.
+    Pass the `offset` and `identity` of a previous run to resume after the rows it already
+    consumed; if the file is no longer the one they were recorded for, it is read from the start.
+    """
+    # Bytes at the start of the file hashed into its identity
+    PREFIX_BYTES = 4096
+
+    def __init__(self, csv_path: str, offset: int = 0, identity: Optional[str] = None):
+        self.csv_path = csv_path
+        self._offset = offset
+        self._resume_identity = identity
+        self._inode: Optional[int] = None
+        self._prefix: Optional[Tuple[int, str]] = None
+        self._columns: Optional[List[str]] = None
+
+    @property
+    def offset(self) -> int:
+        """Number of bytes of the file consumed so far."""
+        return self._offset
+
+    @property
+    def identity(self) -> Optional[str]:
+        """
+        Identify the file consumed so far by its inode and a hash of its first bytes, so an offset
+        can be checked against the file before resuming from it. None until something is consumed.
+        """
+        if self._inode is None or self._prefix is None:
+            return None
+        length, digest = self._prefix
+        return f"{self._inode}:{length}:{digest}"
+
+    def _restart(self, reason: str) -> None:
+        logging.warning(f"{self.csv_path} {reason}. Re-reading from the start.")
+        self._offset = 0
+        self._prefix = None
+        self._columns = None
+
+    def _hash_prefix(self, f, length: int) -> str:
+        f.seek(0)
+        return hashlib.sha256(f.read(length)).hexdigest()
+
+    def _is_resume_file(self, f, stat) -> bool:
+        inode, length, digest = self._resume_identity.split(":")
+        return (int(inode) == stat.st_ino and stat.st_size >= int(length)
+                and self._hash_prefix(f, int(length)) == digest)
+
+    def poll(self, max_bytes: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Return the newly appended rows, or None if nothing new is available.
+        If `max_bytes` is given, at most that many bytes are read, so large backlogs can be consumed in chunks.
+        """
+        try:
+            f = open(self.csv_path, "rb")
+        except OSError:
+            return None
+
+        with f:
+            # Stat the open file, so the inode and size belong to the file being read
+            stat = os.fstat(f.fileno())
+            if self._inode is None and self._resume_identity is not None and self._offset > 0:
+                if not self._is_resume_file(f, stat):
+                    self._restart("is not the file its offset was recorded for")
+            elif self._inode is not None and stat.st_ino != self._inode:
+                self._restart("was replaced")
+            if stat.st_size < self._offset:
+                self._restart(f"shrank from {self._offset} to {stat.st_size} bytes")
+            self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return None
+
+            if self._columns is None and self._offset > 0:
+                f.seek(0)
+                self._columns = pd.read_csv(io.BytesIO(f.readline()), nrows=0).columns.tolist()
+            f.seek(self._offset)
+            to_read = stat.st_size - self._offset
+            if max_bytes is not None:
+                to_read = min(to_read, max_bytes)
+            chunk = f.read(to_read)
+
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                return None
+            chunk = chunk[:end + 1]
+            self._offset += len(chunk)
+            # The hashed prefix grows with the file until it reaches PREFIX_BYTES
+            length = min(self._offset, self.PREFIX_BYTES)
+            if self._prefix is None or self._prefix[0] != length:
+                self._prefix = (length, self._hash_prefix(f, length))
+
+        if self._columns is None:
+            header, _, chunk = chunk.partition(b"\n")
+            self._columns = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+        if not chunk.strip():
+            return None
+        return pd.read_csv(io.BytesIO(chunk), header=None, names=self._columns)
+
+
+class DropDirectoryTailer:
+    """
+    Watches a directory for new CSV files and returns the rows of each file exactly once.
+    Writers should create files under a different extension and rename them to `.csv` when complete.
+    Files that fail to parse are logged and skipped, and retried only once they change.
+    """
+    def __init__(self, drop_dir: str, suffix: str = ".csv"):
+        self.drop_dir = drop_dir
+        self.suffix = suffix
+        self._seen = set()
+        # name -> (mtime, size) of files that failed to parse
+        self._failed = {}
+
+    def poll(self) -> Optional[pd.DataFrame]:
+        """Return the rows of all files that appeared since the previous poll, or None."""
+        if not self.drop_dir or not os.path.isdir(self.drop_dir):
+            return None
+
+        frames = []
+        for name in sorted(os.listdir(self.drop_dir)):
+            if not name.endswith(self.suffix) or name in self._seen:
+                continue
+            path = os.path.join(self.drop_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            version = (stat.st_mtime_ns, stat.st_size)
+            if self._failed.get(name) == version:
+                continue
+            try:
+                frames.append(pd.read_csv(path))
+            except Exception as e:
+                logging.error(f"Skipping {path}, which failed to parse: {e}")
+                self._failed[name] = version
+                continue
+            self._seen.add(name)
+            self._failed.pop(name, None)
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+
+class HourlySnapshot(NamedTuple):
+    rollups: Rollups
+
+
+class HourlyFeed:
+    """
+    Holds the hour/day/week rollups of one feed (deliveries or placements).
+    Readers take a consistent snapshot; `extend` folds new grouped rows in and swaps
+    the snapshot in a single assignment, so callbacks never see a half-applied update.
+    """
+    def __init__(self, value_column: str, data: pd.DataFrame):
+        self.value_column = value_column
+        self._lock = threading.Lock()
+        self._snapshot = HourlySnapshot(rollups=Rollups(compact_hourly_data(data, value_column), value_column))
+
+    def snapshot(self) -> HourlySnapshot:
+        return self._snapshot
+
+    def __getstate__(self):
+        # Feeds are built in loader processes and pickled back; the lock is recreated on arrival
+        return {"value_column": self.value_column, "snapshot": self._snapshot}
+
+    def __setstate__(self, state):
+        self.value_column = state["value_column"]
+        self._snapshot = state["snapshot"]
+        self._lock = threading.Lock()
+
+    def extend(self, rows: pd.DataFrame) -> None:
+        """
+        Fold grouped rows into the rollups. Only the buckets from the earliest hour
+        touched by `rows` onward are recomputed.
+        """
+        if rows is None or rows.empty:
+            return
+
+        rows = compact_hourly_data(rows, self.value_column)
+        with self._lock:
+            self._snapshot = HourlySnapshot(rollups=self._snapshot.rollups.extended(rows))
+
+
+class FeedIngestor(threading.Thread):
+    """
+    Background thread that polls tailers and folds their new rows into hourly feeds.
+    Each source is a (tailer, prepare, feed) triple, where `prepare` turns raw CSV rows
+    into the grouped shape held by the feed, or is None for tailers that already return that shape. Sources are either added up front or, if
+    `sources` is given, fetched from it on every poll.
+    """
+    def __init__(self, poll_seconds: float = 5.0, sources: Optional[Callable[[], list]] = None):
+        super().__init__(name="feed-ingestor", daemon=True)
+        self.poll_seconds = poll_seconds
+        self._sources = []
+        self._source_provider = sources
+        self._stop_event = threading.Event()
+
+    def add_source(self, tailer, prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]], feed: HourlyFeed) -> None:
+        self._sources.append((tailer, prepare, feed))
+
+    def poll_once(self) -> int:
+        """Poll every source once and return the number of raw rows ingested."""
+        ingested = 0
+        sources = self._source_provider() if self._source_provider else self._sources
+        for tailer, prepare, feed in sources:
+            try:
+                rows = tailer.poll()
+                if rows is None or rows.empty:
+                    continue
+                feed.extend(prepare(rows) if prepare else rows)
+                ingested += len(rows)
+            except Exception as e:
+                logging.error(f"Failed to ingest new {feed.value_column} rows: {e}")
+        if ingested:
+            logging.info(f"Ingested {ingested} new rows.")
+        return ingested
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.poll_seconds):
+            self.poll_once()
+
+    def stop(self) -> None:
+        self._stop_event.set()
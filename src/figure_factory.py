@@ -0,0 +1,121 @@
+import base64
+
+import numpy as np
+import plotly.colors
+import plotly.io as pio
+
+# Integer dtypes plotly.js can decode from a typed array spec, smallest first
+TYPED_ARRAY_INTS = [("i1", np.int8), ("u1", np.uint8), ("i2", np.int16), ("u2", np.uint16), ("i4", np.int32), ("u4", np.uint32)]
+
+def typed_array(values):
+    """
+    Encode a numeric array as a plotly.js typed array spec (base64 of the raw little-endian bytes),
+    downcasting integers to the smallest dtype that holds them. Other values are returned unchanged.
+    """
+    if not isinstance(values, np.ndarray) or values.dtype.kind not in "iuf":
+        return values
+    if values.dtype.kind in "iu":
+        low, high = (values.min(), values.max()) if len(values) else (0, 0)
+        for code, dtype in TYPED_ARRAY_INTS:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return {"dtype": code, "bdata": base64.b64encode(values.astype(f"<{code}").tobytes()).decode("ascii")}
+    code = "f4" if values.dtype == np.float32 else "f8"
+    return {"dtype": code, "bdata": base64.b64encode(values.astype(f"<{code}").tobytes()).decode("ascii")}
+
+class ChoroplethFactory:
+    """
+    Builds the natural-earth geo layout, template, colorscales and the empty map once,
+    then stamps out new choropleth figures by swapping in only the trace data.
+    Figures are returned as plain figure dicts, which Dash serializes as-is, so no
+    per-figure validation is done. Returned figures share their layout parts and must
+    not be modified in place.
+    With `typed_arrays`, numeric trace data is sent as base64 typed arrays instead of JSON lists.
+    """
+    MARGIN = {"r": 0, "t": 50, "l": 0, "b": 0}
+
+    def __init__(self, template=None, typed_arrays=True):
+        self.typed_arrays = typed_arrays
+        template = template if template is not None else pio.templates.default
+        self._template = pio.templates[template].to_plotly_json()
+        self._geo = {
+            "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+            "projection": {"type": "natural earth"},
+            "center": {},
+            "showframe": False,
+            "showcoastlines": True,
+        }
+        self._colorscales = {}
+        self._empty = self._figure([{
+            "type": "choropleth",
+            "geo": "geo",
+            "locations": [],
+            "z": [],
+            "colorscale": [[0.0, "#636efa"], [1.0, "#636efa"]],
+            "showscale": False,
+            "showlegend": True,
+            "name": "",
+            "hovertemplate": "locations=%{location}<extra></extra>",
+        }], {"legend": {"tracegroupgap": 0}})
+
+    def _figure(self, data, layout):
+        return {
+            "data": data,
+            "layout": {
+                "template": self._template,
+                "geo": self._geo,
+                "margin": self.MARGIN,
+                **layout,
+            },
+        }
+
+    def colorscale(self, name):
+        """Return the named sequential colorscale, resolving it only the first time it is used."""
+        if name not in self._colorscales:
+            self._colorscales[name] = plotly.colors.get_colorscale(name)
+        return self._colorscales[name]
+
+    def empty(self):
+        """Return the empty world map."""
+        return self._empty
+
+    def continuous(self, locations, values, value_name, colorscale, title, range_color=None, location_name="alpha_3"):
+        """Return a map coloring `locations` (alpha-3 codes) by `values` on a continuous color axis."""
+        coloraxis = {
+            "colorbar": {"title": {"text": value_name}},
+            "colorscale": self.colorscale(colorscale),
+            "autocolorscale": False,
+        }
+        if range_color is not None:
+            coloraxis["cmin"], coloraxis["cmax"] = range_color
+        return self._figure([{
+            "type": "choropleth",
+            "geo": "geo",
+            "coloraxis": "coloraxis",
+            "locations": locations,
+            "z": typed_array(values) if self.typed_arrays else values,
+            "name": "",
+            "hovertemplate": f"{location_name}=%{{location}}<br>{value_name}=%{{z}}<extra></extra>",
+        }], {
+            "coloraxis": coloraxis,
+            "legend": {"tracegroupgap": 0},
+            "title": {"text": title},
+        })
+
+    def discrete(self, locations, hover_names, category, color, title, location_name="iso_alpha"):
+        """Return a map highlighting `locations` (alpha-3 codes) as a single category in one color."""
+        return self._figure([{
+            "type": "choropleth",
+            "geo": "geo",
+            "locations": locations,
+            "z": [1] * len(locations),
+            "hovertext": hover_names,
+            "colorscale": [[0.0, color], [1.0, color]],
+            "showscale": False,
+            "showlegend": True,
+            "name": category,
+            "hovertemplate": f"<b>%{{hovertext}}</b><br><br>category={category}<br>{location_name}=%{{location}}<extra></extra>",
+        }], {
+            "legend": {"title": {"text": "category"}, "tracegroupgap": 0},
+            "title": {"text": title},
+        })
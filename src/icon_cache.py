@@ -0,0 +1,146 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from absl import logging
+
+from config import Config
+
+# Keys are SHA-256 hex digests; anything else is rejected before it can reach a path
+KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+def fetch_url(url: str, timeout: float = 10) -> Tuple[bytes, str]:
+    """Fetch `url` and return its (body, content type)."""
+    import requests
+
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content, response.headers.get("Content-Type", "application/octet-stream")
+
+class IconCache:
+    """
+    Content-addressed on-disk cache of app icon thumbnails.
+    Each icon URL is identified by the SHA-256 of the URL (its key). A key's record points at a
+    blob named after the SHA-256 of the thumbnail bytes, which doubles as its ETag, so identical
+    icons are stored once. Icons are resized with Pillow when it is installed and stored as-is otherwise.
+    Only URLs registered through `src` or `prefetch` are ever fetched, so the cache can't be used as an open proxy.
+    """
+    def __init__(self, cache_dir: str = Config.ICON_CACHE_DIR, size: int = Config.ICON_SIZE,
+                 fetch: Callable[[str], Tuple[bytes, str]] = fetch_url):
+        self.cache_dir = cache_dir
+        self.size = size
+        self._fetch = fetch
+        self._urls: Dict[str, str] = {}
+        # One lock per key, so concurrent requests for an uncached icon fetch it once
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "urls"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def src(self, url: str, prefix: str = "/icons/") -> str:
+        """Register `url` and return the local path the browser should load it from."""
+        key = self.key(url)
+        self._urls[key] = url
+        return f"{prefix}{key}"
+
+    def _record_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "urls", key)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "blobs", digest)
+
+    def _read(self, key: str) -> Optional[Tuple[bytes, str, str]]:
+        try:
+            with open(self._record_path(key)) as f:
+                digest, mimetype = f.read().split()
+            with open(self._blob_path(digest), "rb") as f:
+                return f.read(), mimetype, digest
+        except (OSError, ValueError):
+            return None
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _write(self, path: str, data: bytes) -> None:
+        """Atomically write `data` to `path` through a temporary file unique to this writer."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _thumbnail(self, data: bytes, mimetype: str) -> Tuple[bytes, str]:
+        try:
+            from PIL import Image
+        except ImportError:
+            return data, mimetype
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail((self.size, self.size))
+        out = io.BytesIO()
+        image.convert("RGBA").save(out, format="PNG", optimize=True)
+        return out.getvalue(), "image/png"
+
+    def _store(self, key: str, url: str) -> Tuple[bytes, str, str]:
+        """Fetch and cache the icon of `key`, unless another thread cached it while we waited for the key's lock."""
+        with self._key_lock(key):
+            cached = self._read(key)
+            if cached is not None:
+                return cached
+            data, mimetype = self._thumbnail(*self._fetch(url))
+            digest = hashlib.sha256(data).hexdigest()
+            blob_path = self._blob_path(digest)
+            if not os.path.exists(blob_path):
+                self._write(blob_path, data)
+            self._write(self._record_path(key), f"{digest} {mimetype}".encode("utf-8"))
+            return data, mimetype, digest
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str, str]]:
+        """
+        Return (thumbnail bytes, mimetype, etag) for a key, fetching the icon on first use.
+        Returns None for keys that are malformed, or neither cached nor registered.
+        """
+        if not KEY_PATTERN.fullmatch(key):
+            return None
+        cached = self._read(key)
+        if cached is not None:
+            return cached
+        url = self._urls.get(key)
+        if url is None:
+            return None
+        return self._store(key, url)
+
+    def prefetch(self, urls: Iterable[str], workers: int = 8) -> int:
+        """Fetch and cache every URL that isn't cached yet. Returns the number of icons fetched."""
+        missing = {}
+        for url in urls:
+            if not url:
+                continue
+            key = self.key(url)
+            self._urls[key] = url
+            if not os.path.exists(self._record_path(key)):
+                missing[key] = url
+
+        def fetch_one(item):
+            key, url = item
+            try:
+                self._store(key, url)
+                return True
+            except Exception as e:
+                logging.warning(f"Failed to fetch icon {url}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(fetch_one, missing.items()))
@@ -0,0 +1,64 @@
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+
+from ad_data import (prepare_delivery_data, prepare_placement_data, prepare_publisher_data,
+                     prepare_advertiser_data, prepare_flow_data)
+from ad_data_store import AdDataStore
+from config import Config
+from feed_ingestor import CsvTailer
+
+FLAGS = flags.FLAGS
+flags.DEFINE_string("ad_db_path", Config.AD_DB_PATH, "Path to the SQLite store for the ad datasets.")
+flags.DEFINE_string("deliveries_csv", Config.CSV_PATH_DELIVERIES, "Delivery data CSV.")
+flags.DEFINE_string("placements_csv", Config.CSV_PATH_PLACEMENTS, "Placement data CSV.")
+flags.DEFINE_string("publishers_csv", Config.CSV_PATH_PUBLISHER, "PublisherURL data CSV.")
+flags.DEFINE_string("advertisers_csv", Config.CSV_PATH_ADVERTISER, "AdvertiserURL data CSV.")
+flags.DEFINE_string("flows_csv", Config.CSV_PATH_FLOW, "Advertiser to publisher flow CSV.")
+flags.DEFINE_boolean("follow", False, "Keep running and ingest rows as they are appended.")
+flags.DEFINE_integer("poll_seconds", 5, "How often to poll the CSVs when --follow is set.")
+flags.DEFINE_integer("chunk_bytes", 64 * 1024 * 1024, "Maximum number of CSV bytes parsed at once.")
+
+PREPARE = {
+    "deliveries": prepare_delivery_data,
+    "placements": prepare_placement_data,
+    "publishers": prepare_publisher_data,
+    "advertisers": prepare_advertiser_data,
+    "flows": prepare_flow_data,
+}
+
+def ingest_once(store: AdDataStore, tailers: dict, chunk_bytes: int) -> int:
+    """Ingest everything appended to the CSVs since the last run and return the number of raw rows."""
+    ingested = 0
+    for kind, tailer in tailers.items():
+        while True:
+            rows = tailer.poll(max_bytes=chunk_bytes)
+            if rows is None:
+                break
+            store.store_rows(kind, PREPARE[kind](rows), source=tailer.csv_path, offset=tailer.offset,
+                             identity=tailer.identity)
+            ingested += len(rows)
+            logging.info(f"Ingested {len(rows)} {kind} rows from {tailer.csv_path}.")
+    return ingested
+
+def main(argv):
+    logging.info(f"Args: {argv}")
+    store = AdDataStore(FLAGS.ad_db_path)
+    csv_paths = {
+        "deliveries": FLAGS.deliveries_csv,
+        "placements": FLAGS.placements_csv,
+        "publishers": FLAGS.publishers_csv,
+        "advertisers": FLAGS.advertisers_csv,
+        "flows": FLAGS.flows_csv,
+    }
+    tailers = {kind: CsvTailer(path, *store.get_position(path)) for kind, path in csv_paths.items() if path}
+
+    ingest_once(store, tailers, FLAGS.chunk_bytes)
+    while FLAGS.follow:
+        time.sleep(FLAGS.poll_seconds)
+        ingest_once(store, tailers, FLAGS.chunk_bytes)
+
+if __name__ == "__main__":
+    app.run(main)
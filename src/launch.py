@@ -1,31 +1,97 @@
 from absl import app
 from absl import logging
 
+from dataclasses import dataclass
+import math
+import os
+import numpy as np
 import pandas as pd
 import sqlite3
 import pycountry
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, ctx, dcc, html, no_update, Input, Output, State
+from flask import Response, abort, request
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import dash_bootstrap_components as dbc
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+from ad_data import (prepare_delivery_data, prepare_placement_data, prepare_publisher_data,
+                     prepare_advertiser_data, prepare_flow_data, compact_url_data, memory_report)
+from ad_data_store import AdDataStore, StoreTailer
+from config import Config
 from country_code_converter import CountryCodeConverter
 from database_manager import DatabaseManager
+from feed_ingestor import CsvTailer, DropDirectoryTailer, FeedIngestor, HourlyFeed
+from figure_factory import ChoroplethFactory
+from icon_cache import IconCache
+from overlap_analytics import AppCountryMatrix
+from rollups import RESOLUTIONS
+from snapshot_manager import SnapshotManager
+from startup_loader import StartupLoader
+from url_index import UrlIndex
 
 DB_PATH = "hackathon.db"
 LIMIT = 50
 CHART_TYPE_FREE = "top-free"
 CHART_TYPE_PAID = "top-paid"
 
-CSV_PATH_DELIVERIES = "/Users/xlu/Downloads/delivery_data.csv"
-CSV_PATH_PLACEMENTS = "/Users/xlu/Downloads/placement_data.csv"
-CSV_PATH_PUBLISHER = "/Users/xlu/Downloads/publisher_data.csv"   # PublisherURL data
-CSV_PATH_ADVERTISER = "/Users/xlu/Downloads/advertiser_data.csv" # AdvertiserURL data
+CSV_PATH_DELIVERIES = Config.CSV_PATH_DELIVERIES
+CSV_PATH_PLACEMENTS = Config.CSV_PATH_PLACEMENTS
+CSV_PATH_PUBLISHER = Config.CSV_PATH_PUBLISHER   # PublisherURL data
+CSV_PATH_ADVERTISER = Config.CSV_PATH_ADVERTISER # AdvertiserURL data
 
 # New CSV for flow data (AdvertizerURL, PublisherURL, count)
-CSV_PATH_FLOW = "/Users/xlu/Downloads/flow_data.csv"  # Replace with actual path
+CSV_PATH_FLOW = Config.CSV_PATH_FLOW
+
+# When ingest.py has filled the ad store, the ad datasets are read from it instead of the CSVs,
+# keeping only the latest AD_HISTORY_DAYS dates in memory, so memory use is bounded by this window
+# rather than by how much history the store holds (None keeps everything).
+AD_DB_PATH = Config.AD_DB_PATH
+AD_HISTORY_DAYS = 90
+
+# Directories watched for new delivery/placement CSV files, and how often the feeds are polled
+DROP_DIR_DELIVERIES = "/Users/xlu/Downloads/delivery_drop"
+DROP_DIR_PLACEMENTS = "/Users/xlu/Downloads/placement_drop"
+TAIL_POLL_SECONDS = 5
+
+# Number of URLs per page in the PublisherURL/AdvertiserURL selectors
+URL_PAGE_SIZE = 50
+
+# How often to check the DB and data files for new data to swap into the running dashboard
+SNAPSHOT_POLL_SECONDS = 30
+
+# Worker processes loading the datasets in parallel at startup (None uses every CPU, 1 loads them in turn)
+STARTUP_WORKERS = None
+
+# How often each section of the page advances, in ms. A single timer ticks at the greatest common
+# divisor of these, and each tick updates every section that is due in one request.
+SECTION_INTERVALS_MS = {
+    'snapshot': 2000,
+    'apps': 2000,
+    'delivery': 2000,
+    'placement': 2000,
+    'url': 2000,
+    'advertiser': 2000,
+}
+TICK_MS = math.gcd(*SECTION_INTERVALS_MS.values())
 
 db_manager = DatabaseManager(DB_PATH)
+choropleth_factory = ChoroplethFactory()
+icon_cache = IconCache(Config.ICON_CACHE_DIR)
+ad_store = AdDataStore(AD_DB_PATH) if os.path.exists(AD_DB_PATH) else None
+
+def use_ad_store(kind):
+    return ad_store is not None and ad_store.has_data(kind)
 
 def compute_territory_counts(chart_type, apps):
     data = []
@@ -35,21 +101,21 @@ def compute_territory_counts(chart_type, apps):
         data.append({
             "app_name": app_name,
             "territory_count": len(countries),
-            "icon_url": icon_url
+            "icon_url": icon_url,
+            # Served through the local icon route instead of the remote CDN
+            "icon_src": icon_cache.src(icon_url) if icon_url else ''
         })
     df = pd.DataFrame(data)
     return df
 
 def create_choropleth(chart_type, selected_app):
     if not selected_app:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
+        fig = choropleth_factory.empty()
         return fig
 
     countries = db_manager.get_countries_for_app(selected_app, chart_type=chart_type, limit=LIMIT)
     if not countries:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
+        fig = choropleth_factory.empty()
         return fig
 
     c = CountryCodeConverter(countries).convert()
@@ -57,28 +123,16 @@ def create_choropleth(chart_type, selected_app):
     hover_name = [country['name'] for country in c if country['alpha_3']]
 
     if not iso_alpha:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
+        fig = choropleth_factory.empty()
         return fig
 
-    df = pd.DataFrame({
-        'iso_alpha': iso_alpha,
-        'hover_name': hover_name,
-        'category': ['Hit']*len(iso_alpha)
-    })
-
-    fig = px.choropleth(
-        df,
-        locations='iso_alpha',
-        hover_name='hover_name',
-        color='category',
-        color_discrete_map={'Hit': '#1f77b4'},
-        projection='natural earth',
+    fig = choropleth_factory.discrete(
+        iso_alpha,
+        hover_name,
+        category='Hit',
+        color='#1f77b4',
         title=f"Countries with '{selected_app}' in {chart_type.title().replace('-', ' ')} Apps"
     )
-
-    fig.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
-    fig.update_geos(showframe=False, showcoastlines=True)
     return fig
 
 def create_static_histogram(df, chart_title):
@@ -97,403 +151,716 @@ def create_static_histogram(df, chart_title):
     fig.update_layout(xaxis={'categoryorder':'total descending'}, showlegend=False)
     return fig
 
-all_apps_free = db_manager.fetch_apps_name_from_all_countries(chart_type=CHART_TYPE_FREE, limit=LIMIT)
-all_apps_paid = db_manager.fetch_apps_name_from_all_countries(chart_type=CHART_TYPE_PAID, limit=LIMIT)
 
-territory_counts_df_free = compute_territory_counts(CHART_TYPE_FREE, all_apps_free)
-territory_counts_df_paid = compute_territory_counts(CHART_TYPE_PAID, all_apps_paid)
+# ----- Market Overlap -----
+def load_overlap_matrix(chart_type):
+    return AppCountryMatrix.from_rows(db_manager.fetch_chart_memberships(chart_type, limit=LIMIT))
+
+def create_overlap_heatmap(matrix, chart_type):
+    chart_title = chart_type.title().replace('-', ' ')
+    sizes = np.asarray(matrix.matrix.sum(axis=0)).ravel()
+    charted = [country for country, size in zip(matrix.countries, sizes) if size > 0]
+    if len(charted) < 2:
+        return go.Figure(), f"Not enough {chart_title} charts to compare."
+
+    similarity = matrix.jaccard().loc[charted, charted]
+    labels = [country.upper() for country in charted]
+    fig = go.Figure(data=go.Heatmap(
+        z=similarity.to_numpy(),
+        x=labels,
+        y=labels,
+        zmin=0,
+        zmax=1,
+        colorscale='Viridis',
+        colorbar=dict(title="Jaccard"),
+        hovertemplate="%{y} / %{x}: %{z:.2f}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=f"Similarity of {chart_title} Apps Charts Between Countries",
+        height=800,
+        yaxis={'autorange': 'reversed'}
+    )
 
-histogram_free_fig = create_static_histogram(territory_counts_df_free, "Number of Territories per Free App (Top 20)")
-histogram_paid_fig = create_static_histogram(territory_counts_df_paid, "Number of Territories per Paid App (Top 20)")
+    # Most similar pair of different countries
+    values = similarity.to_numpy().copy()
+    np.fill_diagonal(values, -1)
+    i, j = np.unravel_index(np.argmax(values), values.shape)
+    info = (f"Most similar {chart_title} charts: {labels[i]} and {labels[j]} "
+            f"share {values[i, j]:.0%} of their apps.")
+    return fig, info
 
 # ----- Deliveries Data -----
 def load_delivery_data(csv_path=CSV_PATH_DELIVERIES):
-    df = pd.read_csv(csv_path)
-    df = df[df['GeoCode'].notna() & (df['GeoCode'] != "")]
-    df['EventHour'] = pd.to_datetime(df['EventHour'], format='%Y-%m-%d %H', errors='coerce')
-    grouped = df.groupby(['EventDate', 'EventHour', 'GeoCode'], as_index=False)['Deliveries'].sum()
-    return grouped
-
-delivery_data = load_delivery_data()
-max_deliveries = delivery_data['Deliveries'].max()
-unique_hours_deliveries = sorted(delivery_data['EventHour'].dropna().unique())
-delivery_data['alpha_3'] = delivery_data['GeoCode'].apply(lambda x: CountryCodeConverter([x]).convert()[0]['alpha_3'])
-
-def create_delivery_choropleth(current_hour):
-    dff = delivery_data[delivery_data['EventHour'] == current_hour].copy()
-    dff = dff.dropna(subset=['alpha_3'])
-    if dff.empty:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
-        return fig, f"No deliveries for hour {current_hour}"
-
-    fig = px.choropleth(
-        dff,
-        locations='alpha_3',
-        color='Deliveries',
-        color_continuous_scale='Reds',
-        range_color=(0, max_deliveries), 
-        projection='natural earth',
-        title=f"Deliveries at hour {current_hour.strftime('%Y-%m-%d %H:%M')}"
+    if use_ad_store('deliveries'):
+        return ad_store.load('deliveries', days=AD_HISTORY_DAYS)
+    return prepare_delivery_data(pd.read_csv(csv_path))
+
+def load_hourly_feed(value_column, prepare, tailers):
+    frames = [rows for rows in (tailer.poll() for tailer in tailers) if rows is not None]
+    if not frames:
+        raise FileNotFoundError(f"No {value_column} data found.")
+    return HourlyFeed(value_column, prepare(pd.concat(frames, ignore_index=True)))
+
+# With the ad store, ingest.py --follow keeps the store up to date and the feeds follow its change
+# log; without it, the feeds tail the CSV and drop directory themselves.
+def load_delivery_feed():
+    """Return the delivery feed and the (tailer, prepare) sources that keep it live."""
+    if use_ad_store('deliveries'):
+        rows, seq = ad_store.load_live('deliveries', days=AD_HISTORY_DAYS)
+        return HourlyFeed('Deliveries', rows), [(StoreTailer(ad_store, 'deliveries', seq), None)]
+    tailers = [CsvTailer(CSV_PATH_DELIVERIES), DropDirectoryTailer(DROP_DIR_DELIVERIES)]
+    feed = load_hourly_feed('Deliveries', prepare_delivery_data, tailers)
+    return feed, [(tailer, prepare_delivery_data) for tailer in tailers]
+
+def frame_window(rollups, n, resolution='hour', start_date=None, end_date=None):
+    """
+    Return the [start, end) window of the n-th frame when cycling through the `resolution`
+    buckets of the picked date range (end date inclusive), or None if the range has no data.
+    Buckets that straddle the range edges are clipped to it.
+    """
+    range_start = pd.Timestamp(start_date) if start_date else None
+    range_end = pd.Timestamp(end_date) + pd.Timedelta(days=1) if end_date else None
+    buckets = rollups.buckets(resolution, range_start, range_end)
+    if not buckets:
+        return None
+    start = buckets[n % len(buckets)]
+    end = start + RESOLUTIONS[resolution]
+    if range_start is not None and range_start > start:
+        start = range_start
+    if range_end is not None and range_end < end:
+        end = range_end
+    return start, end
+
+def frame_label(start, end, resolution='hour'):
+    if resolution == 'hour':
+        return f"at hour {start.strftime('%Y-%m-%d %H:%M')}"
+    last_day = end - pd.Timedelta(days=1)
+    if last_day <= start:
+        return f"on {start.strftime('%Y-%m-%d')}"
+    return f"from {start.strftime('%Y-%m-%d')} to {last_day.strftime('%Y-%m-%d')}"
+
+def create_delivery_choropleth(snapshot, start, end, resolution='hour'):
+    label = frame_label(start, end, resolution)
+    alpha_3, deliveries = snapshot.rollups.query(start, end)
+    if len(alpha_3) == 0:
+        fig = choropleth_factory.empty()
+        return fig, f"No deliveries {label}"
+
+    fig = choropleth_factory.continuous(
+        alpha_3,
+        deliveries,
+        value_name='Deliveries',
+        colorscale='Reds',
+        range_color=(0, snapshot.rollups.max_value(resolution)),
+        title=f"Deliveries {label}"
     )
-    fig.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
-    fig.update_geos(showframe=False, showcoastlines=True)
-    total_deliveries = dff['Deliveries'].sum()
-    info = f"Total Deliveries: {total_deliveries:,} at {current_hour.strftime('%Y-%m-%d %H:%M')}"
+    info = f"Total Deliveries: {deliveries.sum():,} {label}"
     return fig, info
 
 # ----- Placement Data -----
 def load_placement_data(csv_path=CSV_PATH_PLACEMENTS):
-    df = pd.read_csv(csv_path)
-    df = df[df['GeoCode'].notna() & (df['GeoCode'] != "")]
-    df['EventHour'] = pd.to_datetime(df['EventHour'], format='%Y-%m-%d %H', errors='coerce')
-    grouped = df.groupby(['EventDate', 'EventHour', 'GeoCode'], as_index=False)['PlacementCount'].sum()
-    return grouped
-
-placement_data = load_placement_data()
-placement_data['alpha_3'] = placement_data['GeoCode'].apply(lambda x: CountryCodeConverter([x]).convert()[0]['alpha_3'])
-unique_hours_placement = sorted(placement_data['EventHour'].dropna().unique())
-max_placement = placement_data['PlacementCount'].max()
-
-def create_placement_choropleth(current_hour):
-    dff = placement_data[placement_data['EventHour'] == current_hour].copy()
-    dff = dff.dropna(subset=['alpha_3'])
-    if dff.empty:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
-        return fig, f"No placements for hour {current_hour}"
-
-    fig = px.choropleth(
-        dff,
-        locations='alpha_3',
-        color='PlacementCount',
-        color_continuous_scale='Blues',
-        range_color=(0, max_placement),
-        projection='natural earth',
-        title=f"Placements at hour {current_hour.strftime('%Y-%m-%d %H:%M')}"
+    if use_ad_store('placements'):
+        return ad_store.load('placements', days=AD_HISTORY_DAYS)
+    return prepare_placement_data(pd.read_csv(csv_path))
+
+def load_placement_feed():
+    """Return the placement feed and the (tailer, prepare) sources that keep it live."""
+    if use_ad_store('placements'):
+        rows, seq = ad_store.load_live('placements', days=AD_HISTORY_DAYS)
+        return HourlyFeed('PlacementCount', rows), [(StoreTailer(ad_store, 'placements', seq), None)]
+    tailers = [CsvTailer(CSV_PATH_PLACEMENTS), DropDirectoryTailer(DROP_DIR_PLACEMENTS)]
+    feed = load_hourly_feed('PlacementCount', prepare_placement_data, tailers)
+    return feed, [(tailer, prepare_placement_data) for tailer in tailers]
+
+def create_placement_choropleth(snapshot, start, end, resolution='hour'):
+    label = frame_label(start, end, resolution)
+    alpha_3, placements = snapshot.rollups.query(start, end)
+    if len(alpha_3) == 0:
+        fig = choropleth_factory.empty()
+        return fig, f"No placements {label}"
+
+    fig = choropleth_factory.continuous(
+        alpha_3,
+        placements,
+        value_name='PlacementCount',
+        colorscale='Blues',
+        range_color=(0, snapshot.rollups.max_value(resolution)),
+        title=f"Placements {label}"
     )
-    fig.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
-    fig.update_geos(showframe=False, showcoastlines=True)
-    total_placements = dff['PlacementCount'].sum()
-    info = f"Total Placements: {total_placements:,} at {current_hour.strftime('%Y-%m-%d %H:%M')}"
+    info = f"Total Placements: {placements.sum():,} {label}"
     return fig, info
 
 # ----- PublisherURL Data -----
 def load_publisher_data(csv_path=CSV_PATH_PUBLISHER):
-    df = pd.read_csv(csv_path)
-    df = df[df['GeoCode'].notna() & (df['GeoCode'] != "")]
-    df['alpha_3'] = df['GeoCode'].apply(lambda x: CountryCodeConverter([x]).convert()[0]['alpha_3'])
-    grouped = df.groupby(['EventDate', 'PublisherURL', 'alpha_3'], as_index=False)['Count'].sum()
-    return grouped
-
-publisher_data = load_publisher_data()
-unique_urls = publisher_data['PublisherURL'].unique()
-
-def create_publisher_choropleth(publisher_url):
-    dff = publisher_data[publisher_data['PublisherURL'] == publisher_url].copy()
-    dff = dff.dropna(subset=['alpha_3'])
-    if dff.empty:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
+    if use_ad_store('publishers'):
+        return compact_url_data(ad_store.load('publishers', days=AD_HISTORY_DAYS), 'PublisherURL')
+    return compact_url_data(prepare_publisher_data(pd.read_csv(csv_path)), 'PublisherURL')
+
+def create_publisher_choropleth(publisher_index, publisher_url):
+    found = publisher_index.lookup(publisher_url)
+    if found is None:
+        fig = choropleth_factory.empty()
         return fig, f"No data for {publisher_url}"
 
-    fig = px.choropleth(
-        dff,
-        locations='alpha_3',
-        color='Count',
-        color_continuous_scale='Greens',
-        projection='natural earth',
+    alpha_3, counts = found
+    fig = choropleth_factory.continuous(
+        alpha_3,
+        counts,
+        value_name='Count',
+        colorscale='Greens',
         title=f"Counts for URL: {publisher_url}"
     )
-    fig.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
-    fig.update_geos(showframe=False, showcoastlines=True)
-    total_count = dff['Count'].sum()
+    total_count = counts.sum()
     info = f"Total Count: {total_count:,} for {publisher_url}"
     return fig, info
 
 # ----- AdvertiserURL Data -----
 def load_advertiser_data(csv_path=CSV_PATH_ADVERTISER):
-    df = pd.read_csv(csv_path)
-    df = df[df['GeoCode'].notna() & (df['GeoCode'] != "")]
-    df['alpha_3'] = df['GeoCode'].apply(lambda x: CountryCodeConverter([x]).convert()[0]['alpha_3'])
-    grouped = df.groupby(['EventDate', 'AdvertiserURL', 'alpha_3'], as_index=False)['Count'].sum()
-    return grouped
-
-advertiser_data = load_advertiser_data()
-unique_advertiser_urls = advertiser_data['AdvertiserURL'].unique()
-
-def create_advertiser_choropleth(advertiser_url):
-    dff = advertiser_data[advertiser_data['AdvertiserURL'] == advertiser_url].copy()
-    dff = dff.dropna(subset=['alpha_3'])
-    if dff.empty:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
+    if use_ad_store('advertisers'):
+        return compact_url_data(ad_store.load('advertisers', days=AD_HISTORY_DAYS), 'AdvertiserURL')
+    return compact_url_data(prepare_advertiser_data(pd.read_csv(csv_path)), 'AdvertiserURL')
+
+def create_advertiser_choropleth(advertiser_index, advertiser_url):
+    found = advertiser_index.lookup(advertiser_url)
+    if found is None:
+        fig = choropleth_factory.empty()
         return fig, f"No data for {advertiser_url}"
 
-    fig = px.choropleth(
-        dff,
-        locations='alpha_3',
-        color='Count',
-        color_continuous_scale='Purples',  
-        projection='natural earth',
+    alpha_3, counts = found
+    fig = choropleth_factory.continuous(
+        alpha_3,
+        counts,
+        value_name='Count',
+        colorscale='Purples',
         title=f"Counts for Advertiser URL: {advertiser_url}"
     )
-    fig.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
-    fig.update_geos(showframe=False, showcoastlines=True)
-    total_count = dff['Count'].sum()
+    total_count = counts.sum()
     info = f"Total Count: {total_count:,} for {advertiser_url}"
     return fig, info
 
 # ----- Flow Data (AdvertizerURL, PublisherURL, count) for Sankey -----
 def load_flow_data(csv_path=CSV_PATH_FLOW):
-    df = pd.read_csv(csv_path)
-    # df:
-    # AdvertizerURL, PublisherURL, count
-    # Some rows have missing AdvertizerURL or PublisherURL? Filter them out:
-    df = df.dropna(subset=["PublisherURL", "count"])  # Keep only rows with PublisherURL and count
-    # If AdvertizerURL can be empty, treat them as a separate category or skip?
-    # Let's assume we keep rows only where PublisherURL is not empty. If AdvertizerURL is empty, treat as unknown:
-    # For simplicity, let's fill empty AdvertizerURL with "Unknown Advertiser"
-    df['AdvertizerURL'] = df['AdvertizerURL'].fillna("Unknown Advertiser")
-    return df
+    if use_ad_store('flows'):
+        return ad_store.load('flows')
+    return prepare_flow_data(pd.read_csv(csv_path))
+
+def create_sankey(flow_data):
+    # Create node lists
+    advertisers = flow_data['AdvertizerURL'].unique().tolist()
+    publishers = flow_data['PublisherURL'].unique().tolist()
+
+    # Create a map from advertiser/publisher to node index
+    # Let's put all advertisers first, then publishers
+    advertiser_nodes = advertisers
+    publisher_nodes = publishers
+    nodes = advertiser_nodes + publisher_nodes
+
+    node_indices = {node: i for i, node in enumerate(nodes)}
+
+    source_indices = [node_indices[adv] for adv in flow_data['AdvertizerURL']]
+    target_indices = [node_indices[pub] for pub in flow_data['PublisherURL']]
+    values = flow_data['count'].tolist()
+
+    sankey_fig = go.Figure(data=[go.Sankey(
+        arrangement="snap",
+        node=dict(
+            pad=15,
+            thickness=20,
+            line=dict(color="black", width=0.5),
+            label=nodes,
+            color="blue"
+        ),
+        link=dict(
+            source=source_indices,
+            target=target_indices,
+            value=values
+        )
+    )])
+    sankey_fig.update_layout(title_text="Advertiser to Publisher Flows", font_size=10)
+    return sankey_fig
+
+# ----- Data Snapshots -----
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Everything the callbacks derive from the DB and data files, built together and swapped in as one."""
+    version: str
+    all_apps_free: list
+    all_apps_paid: list
+    territory_counts_df_free: pd.DataFrame
+    territory_counts_df_paid: pd.DataFrame
+    histogram_free_fig: go.Figure
+    histogram_paid_fig: go.Figure
+    delivery_feed: HourlyFeed
+    placement_feed: HourlyFeed
+    publisher_index: UrlIndex
+    advertiser_index: UrlIndex
+    flow_data: pd.DataFrame
+    sankey_fig: go.Figure
+    overlap_free: AppCountryMatrix
+    overlap_paid: AppCountryMatrix
+    # (tailer, prepare, feed) sources that keep the delivery/placement feeds live
+    tail_sources: list
+
+def file_stamp(path, follow_appends=False):
+    """
+    Identify the current contents of a file. Appends to tailed files are picked up by the feed
+    ingestor, so for those only replacing the file counts as a change.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino,) if follow_appends else (stat.st_mtime_ns, stat.st_size)
+
+def ad_data_stamp(kind, csv_path, store_versions, live=False):
+    """
+    Identify the current data of one ad dataset. Stored rows of the live datasets are followed by the
+    feed ingestor, so for those only switching between the store and the CSV counts as a change.
+    """
+    if use_ad_store(kind):
+        return ('store', None if live else store_versions.get(kind))
+    return file_stamp(csv_path, follow_appends=live)
+
+def data_version():
+    store_versions = ad_store.get_versions() if ad_store is not None else {}
+    return (
+        # Only completed update runs count, so a rebuild never picks up a half-written day
+        db_manager.get_published_version(),
+        # Writes to the store are tracked per dataset above; only replacing it counts as a whole
+        file_stamp(AD_DB_PATH, follow_appends=True),
+        ad_data_stamp('deliveries', CSV_PATH_DELIVERIES, store_versions, live=True),
+        ad_data_stamp('placements', CSV_PATH_PLACEMENTS, store_versions, live=True),
+        ad_data_stamp('publishers', CSV_PATH_PUBLISHER, store_versions),
+        ad_data_stamp('advertisers', CSV_PATH_ADVERTISER, store_versions),
+        ad_data_stamp('flows', CSV_PATH_FLOW, store_versions),
+    )
 
-flow_data = load_flow_data(CSV_PATH_FLOW)
-
-# Create node lists
-advertisers = flow_data['AdvertizerURL'].unique().tolist()
-publishers = flow_data['PublisherURL'].unique().tolist()
-
-# Create a map from advertiser/publisher to node index
-# Let's put all advertisers first, then publishers
-advertiser_nodes = advertisers
-publisher_nodes = publishers
-nodes = advertiser_nodes + publisher_nodes
-
-node_indices = {node: i for i, node in enumerate(nodes)}
-
-source_indices = [node_indices[adv] for adv in flow_data['AdvertizerURL']]
-target_indices = [node_indices[pub] for pub in flow_data['PublisherURL']]
-values = flow_data['count'].tolist()
-
-sankey_fig = go.Figure(data=[go.Sankey(
-    arrangement="snap",
-    node=dict(
-        pad=15,
-        thickness=20,
-        line=dict(color="black", width=0.5),
-        label=nodes,
-        color="blue"
-    ),
-    link=dict(
-        source=source_indices,
-        target=target_indices,
-        value=values
+def load_top_apps(chart_type):
+    return db_manager.fetch_apps_name_from_all_countries(chart_type=chart_type, limit=LIMIT)
+
+def load_url_index(load, url_column):
+    # Only the index is kept; the frame it is built from is dropped once loaded
+    return UrlIndex(load(), url_column)
+
+def register_icons(territory_counts_df):
+    """Register the icons of counts computed in a loader process, so /icons/ serves them from this one."""
+    for icon_url in territory_counts_df.get('icon_url', []):
+        if icon_url:
+            icon_cache.src(icon_url)
+
+def build_snapshot(version):
+    loader = StartupLoader(STARTUP_WORKERS)
+    loader.add('apps_free', load_top_apps, CHART_TYPE_FREE)
+    loader.add('apps_paid', load_top_apps, CHART_TYPE_PAID)
+    loader.add('territory_counts_free', compute_territory_counts, CHART_TYPE_FREE, after=('apps_free',))
+    loader.add('territory_counts_paid', compute_territory_counts, CHART_TYPE_PAID, after=('apps_paid',))
+    loader.add('delivery', load_delivery_feed)
+    loader.add('placement', load_placement_feed)
+    loader.add('publisher', load_url_index, load_publisher_data, 'PublisherURL')
+    loader.add('advertiser', load_url_index, load_advertiser_data, 'AdvertiserURL')
+    loader.add('flow', load_flow_data, CSV_PATH_FLOW)
+    loader.add('overlap_free', load_overlap_matrix, CHART_TYPE_FREE)
+    loader.add('overlap_paid', load_overlap_matrix, CHART_TYPE_PAID)
+    loaded = loader.run()
+
+    all_apps_free, all_apps_paid = loaded['apps_free'], loaded['apps_paid']
+    territory_counts_df_free = loaded['territory_counts_free']
+    territory_counts_df_paid = loaded['territory_counts_paid']
+    register_icons(territory_counts_df_free)
+    register_icons(territory_counts_df_paid)
+
+    delivery_feed, delivery_sources = loaded['delivery']
+    placement_feed, placement_sources = loaded['placement']
+    tail_sources = ([(tailer, prepare, delivery_feed) for tailer, prepare in delivery_sources] +
+                    [(tailer, prepare, placement_feed) for tailer, prepare in placement_sources])
+
+    publisher_index = loaded['publisher']
+    advertiser_index = loaded['advertiser']
+    flow_data = loaded['flow']
+
+    report = memory_report({
+        'delivery_rollups': delivery_feed.snapshot().rollups,
+        'placement_rollups': placement_feed.snapshot().rollups,
+        'publisher_index': publisher_index,
+        'advertiser_index': advertiser_index,
+    })
+    logging.info(f"Ad data memory footprint:\n{report.to_string(index=False)}")
+
+    return DashboardSnapshot(
+        version=str(version),
+        all_apps_free=all_apps_free,
+        all_apps_paid=all_apps_paid,
+        territory_counts_df_free=territory_counts_df_free,
+        territory_counts_df_paid=territory_counts_df_paid,
+        histogram_free_fig=create_static_histogram(territory_counts_df_free, "Number of Territories per Free App (Top 20)"),
+        histogram_paid_fig=create_static_histogram(territory_counts_df_paid, "Number of Territories per Paid App (Top 20)"),
+        delivery_feed=delivery_feed,
+        placement_feed=placement_feed,
+        publisher_index=publisher_index,
+        advertiser_index=advertiser_index,
+        flow_data=flow_data,
+        sankey_fig=create_sankey(flow_data),
+        overlap_free=loaded['overlap_free'],
+        overlap_paid=loaded['overlap_paid'],
+        tail_sources=tail_sources
     )
-)])
-sankey_fig.update_layout(title_text="Advertiser to Publisher Flows", font_size=10)
+
+snapshots = SnapshotManager(build_snapshot, data_version, poll_seconds=SNAPSHOT_POLL_SECONDS)
+
+# Dash serializes every response through plotly's JSON encoder; orjson is several times faster than the stdlib engine.
+if orjson is not None:
+    pio.json.config.default_engine = "orjson"
+else:
+    logging.warning("orjson is not installed. Responses are serialized with the slower json engine.")
 
 dash_app = Dash(__name__, external_stylesheets=[dbc.themes.LUX])
 
-dash_app.layout = dbc.Container(
-    fluid=True,
-    children=[
-        html.H1("Top-50 Apps by Territory (Free vs Paid)", className="mt-3 mb-3 text-center"),
-        dcc.Interval(id='interval-component', interval=2000, n_intervals=0),
-
-        dbc.Row([
-            dbc.Col([
-                html.H3("Top-Free Apps"),
-                html.Div(id='app-info-free', className="mt-3"),
-                html.Img(id='app-icon-free', style={'height': '100px', 'margin-top': '10px'}),
-                dcc.Loading(
-                    id="loading-map-free",
-                    children=[dcc.Graph(id='world-map-free')],
-                    type="default"
-                ),
-                dcc.Graph(figure=histogram_free_fig, id='histogram-free')
-            ], width=6),
-
-            dbc.Col([
-                html.H3("Top-Paid Apps"),
-                html.Div(id='app-info-paid', className="mt-3"),
-                html.Img(id='app-icon-paid', style={'height': '100px', 'margin-top': '10px'}),
-                dcc.Loading(
-                    id="loading-map-paid",
-                    children=[dcc.Graph(id='world-map-paid')],
-                    type="default"
-                ),
-                dcc.Graph(figure=histogram_paid_fig, id='histogram-paid')
-            ], width=6)
-        ], className="mt-4"),
-
-        html.Hr(),
-
-        html.H1("Worldwide Ad Deliveries and Placements Over Time", className="mt-3 mb-3 text-center"),
-        dbc.Row([
-            dbc.Col([
-                html.H3("Deliveries"),
-                dcc.Interval(id='delivery-interval', interval=2000, n_intervals=0),
-                dcc.Loading(
-                    id="loading-delivery-map",
-                    children=[dcc.Graph(id='delivery-map')],
-                    type="default"
-                ),
-                html.Div(id='delivery-info', className="mt-3 text-center")
-            ], width=6),
-            dbc.Col([
-                html.H3("Placements"),
-                dcc.Interval(id='placement-interval', interval=2000, n_intervals=0),
-                dcc.Loading(
-                    id="loading-placement-map",
-                    children=[dcc.Graph(id='placement-map')],
-                    type="default"
-                ),
-                html.Div(id='placement-info', className="mt-3 text-center")
-            ], width=6),
-        ], className="mt-4"),
-
-        html.Hr(),
-
-        html.H1("Counts by PublisherURL and AdvertiserURL", className="mt-3 mb-3 text-center"),
-        dbc.Row([
-            dbc.Col([
-                html.H3("PublisherURL"),
-                dcc.Interval(id='url-interval', interval=2000, n_intervals=0),
-                dcc.Loading(
-                    id="loading-url-map",
-                    children=[dcc.Graph(id='url-map')],
-                    type="default"
-                ),
-                html.Div(id='url-info', className="mt-3 text-center")
-            ], width=6),
-            dbc.Col([
-                html.H3("AdvertiserURL"),
-                dcc.Interval(id='advertiser-interval', interval=2000, n_intervals=0),
-                dcc.Loading(
-                    id="loading-advertiser-map",
-                    children=[dcc.Graph(id='advertiser-map')],
-                    type="default"
-                ),
-                html.Div(id='advertiser-info', className="mt-3 text-center")
-            ], width=6),
-        ], className="mt-4"),
-
-        html.Hr(),
-
-        # New Sankey diagram for directional flow
-        html.H1("Advertiser to Publisher Flows", className="mt-3 mb-3 text-center"),
-        dcc.Graph(figure=sankey_fig, id='flow-sankey')
-    ]
-)
+# Compress layout and callback responses with brotli, or gzip for clients that don't accept it.
+if Compress is not None:
+    dash_app.server.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+    Compress(dash_app.server)
+else:
+    logging.warning("flask-compress is not installed. Responses are sent uncompressed.")
+
+@dash_app.server.route('/icons/<key>')
+def serve_icon(key):
+    """Serve a cached icon thumbnail, fetching it from its origin on first use."""
+    try:
+        icon = icon_cache.get(key)
+    except Exception as e:
+        logging.warning(f"Failed to fetch icon {key}: {e}")
+        abort(502)
+    if icon is None:
+        abort(404)
+
+    data, mimetype, etag = icon
+    response = Response(data, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 365 * 24 * 3600
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+def serve_layout():
+    snapshot = snapshots.current()
+    ad_days = (snapshot.delivery_feed.snapshot().rollups.buckets('day') +
+               snapshot.placement_feed.snapshot().rollups.buckets('day'))
+    ad_first_day = min(ad_days).date() if ad_days else None
+    ad_last_day = max(ad_days).date() if ad_days else None
+    return dbc.Container(
+        fluid=True,
+        children=[
+            html.H1("Top-50 Apps by Territory (Free vs Paid)", className="mt-3 mb-3 text-center"),
+            # The one timer of the page; assets/pause_hidden_tabs.js disables it while the tab is hidden
+            dcc.Interval(id='tick', interval=TICK_MS, n_intervals=0),
+            dcc.Store(id='snapshot-version', data=snapshot.version),
+
+            dbc.Row([
+                dbc.Col([
+                    html.H3("Top-Free Apps"),
+                    html.Div(id='app-info-free', className="mt-3"),
+                    html.Img(id='app-icon-free', style={'height': '100px', 'margin-top': '10px'}),
+                    dcc.Loading(
+                        id="loading-map-free",
+                        children=[dcc.Graph(id='world-map-free')],
+                        type="default"
+                    ),
+                    dcc.Graph(figure=snapshot.histogram_free_fig, id='histogram-free')
+                ], width=6),
+
+                dbc.Col([
+                    html.H3("Top-Paid Apps"),
+                    html.Div(id='app-info-paid', className="mt-3"),
+                    html.Img(id='app-icon-paid', style={'height': '100px', 'margin-top': '10px'}),
+                    dcc.Loading(
+                        id="loading-map-paid",
+                        children=[dcc.Graph(id='world-map-paid')],
+                        type="default"
+                    ),
+                    dcc.Graph(figure=snapshot.histogram_paid_fig, id='histogram-paid')
+                ], width=6)
+            ], className="mt-4"),
+
+            html.Hr(),
+
+            html.H1("Worldwide Ad Deliveries and Placements Over Time", className="mt-3 mb-3 text-center"),
+            dbc.Row([
+                dbc.Col([
+                    dcc.DatePickerRange(
+                        id='ad-date-range',
+                        min_date_allowed=ad_first_day,
+                        max_date_allowed=ad_last_day,
+                        clearable=True
+                    )
+                ], width="auto"),
+                dbc.Col([
+                    dbc.RadioItems(
+                        id='ad-resolution',
+                        options=[{'label': resolution.capitalize(), 'value': resolution} for resolution in RESOLUTIONS],
+                        value='hour',
+                        inline=True
+                    )
+                ], width="auto", className="align-self-center")
+            ], justify="center"),
+            dbc.Row([
+                dbc.Col([
+                    html.H3("Deliveries"),
+                    dcc.Loading(
+                        id="loading-delivery-map",
+                        children=[dcc.Graph(id='delivery-map')],
+                        type="default"
+                    ),
+                    html.Div(id='delivery-info', className="mt-3 text-center")
+                ], width=6),
+                dbc.Col([
+                    html.H3("Placements"),
+                    dcc.Loading(
+                        id="loading-placement-map",
+                        children=[dcc.Graph(id='placement-map')],
+                        type="default"
+                    ),
+                    html.Div(id='placement-info', className="mt-3 text-center")
+                ], width=6),
+            ], className="mt-4"),
+
+            html.Hr(),
+
+            html.H1("Counts by PublisherURL and AdvertiserURL", className="mt-3 mb-3 text-center"),
+            dbc.Row([
+                dbc.Col([
+                    html.H3("PublisherURL"),
+                    dcc.Dropdown(id='url-select', placeholder="Cycling through top URLs. Type to search...", options=[]),
+                    dbc.Pagination(id='url-pages', max_value=1, active_page=1, fully_expanded=False, className="mt-2"),
+                    dcc.Loading(
+                        id="loading-url-map",
+                        children=[dcc.Graph(id='url-map')],
+                        type="default"
+                    ),
+                    html.Div(id='url-info', className="mt-3 text-center")
+                ], width=6),
+                dbc.Col([
+                    html.H3("AdvertiserURL"),
+                    dcc.Dropdown(id='advertiser-select', placeholder="Cycling through top URLs. Type to search...", options=[]),
+                    dbc.Pagination(id='advertiser-pages', max_value=1, active_page=1, fully_expanded=False, className="mt-2"),
+                    dcc.Loading(
+                        id="loading-advertiser-map",
+                        children=[dcc.Graph(id='advertiser-map')],
+                        type="default"
+                    ),
+                    html.Div(id='advertiser-info', className="mt-3 text-center")
+                ], width=6),
+            ], className="mt-4"),
+
+            html.Hr(),
+
+            # New Sankey diagram for directional flow
+            html.H1("Advertiser to Publisher Flows", className="mt-3 mb-3 text-center"),
+            dcc.Graph(figure=snapshot.sankey_fig, id='flow-sankey'),
+
+            html.Hr(),
+
+            html.H1("Top-50 Apps Overlap Between Countries", className="mt-3 mb-3 text-center"),
+            dbc.RadioItems(
+                id='overlap-chart-type',
+                options=[
+                    {'label': "Top-Free Apps", 'value': CHART_TYPE_FREE},
+                    {'label': "Top-Paid Apps", 'value': CHART_TYPE_PAID}
+                ],
+                value=CHART_TYPE_FREE,
+                inline=True,
+                className="text-center"
+            ),
+            html.Div(id='overlap-info', className="mt-3 text-center"),
+            dcc.Graph(id='overlap-heatmap')
+        ]
+    )
+
+dash_app.layout = serve_layout
+
+def refresh_snapshot_figures(n, shown_version):
+    """Push the static figures to open pages only when a new snapshot has been swapped in."""
+    snapshot = snapshots.current()
+    if shown_version == snapshot.version:
+        raise PreventUpdate
+    return snapshot.histogram_free_fig, snapshot.histogram_paid_fig, snapshot.sankey_fig, snapshot.version
+
+def app_frame(chart_type, apps, territory_counts_df, n):
+    """Return the (map, info, icon src) of the n-th app of a top-apps chart."""
+    kind = 'free' if chart_type == CHART_TYPE_FREE else 'paid'
+    current_app = apps[n % len(apps)] if apps else None
+    if not current_app:
+        fig = choropleth_factory.empty()
+        return fig, f"No {kind} apps available.", ''
+
+    countries = db_manager.get_countries_for_app(current_app, chart_type=chart_type, limit=LIMIT)
+    fig = create_choropleth(chart_type, current_app)
+    info = f"'{current_app}' appears in the top-50 {kind} apps for {len(countries)} territories."
+    icon = territory_counts_df.loc[territory_counts_df['app_name'] == current_app, 'icon_src']
+    icon = icon.iloc[0] if not icon.empty else ''
+    return fig, info, icon
 
-@dash_app.callback(
-    Output('world-map-free', 'figure'),
-    Output('app-info-free', 'children'),
-    Output('app-icon-free', 'src'),
-    Output('world-map-paid', 'figure'),
-    Output('app-info-paid', 'children'),
-    Output('app-icon-paid', 'src'),
-    Input('interval-component', 'n_intervals'),
-    prevent_initial_call=False
-)
 def update_maps_and_icons(n):
-    current_app_free = all_apps_free[n % len(all_apps_free)] if all_apps_free else None
-    current_app_paid = all_apps_paid[n % len(all_apps_paid)] if all_apps_paid else None
-
-    # Free apps
-    if current_app_free:
-        countries_free = db_manager.get_countries_for_app(current_app_free, chart_type=CHART_TYPE_FREE, limit=LIMIT)
-        fig_free = create_choropleth(CHART_TYPE_FREE, current_app_free)
-        info_free = f"'{current_app_free}' appears in the top-50 free apps for {len(countries_free)} territories."
-        icon_free = territory_counts_df_free.loc[territory_counts_df_free['app_name'] == current_app_free, 'icon_url']
-        icon_free = icon_free.iloc[0] if not icon_free.empty else ''
-    else:
-        fig_free = px.choropleth(None, locations=[], projection='natural earth')
-        fig_free.update_geos(showframe=False, showcoastlines=True)
-        info_free = "No free apps available."
-        icon_free = ''
-
-    # Paid apps
-    if current_app_paid:
-        countries_paid = db_manager.get_countries_for_app(current_app_paid, chart_type=CHART_TYPE_PAID, limit=LIMIT)
-        fig_paid = create_choropleth(CHART_TYPE_PAID, current_app_paid)
-        info_paid = f"'{current_app_paid}' appears in the top-50 paid apps for {len(countries_paid)} territories."
-        icon_paid = territory_counts_df_paid.loc[territory_counts_df_paid['app_name'] == current_app_paid, 'icon_url']
-        icon_paid = icon_paid.iloc[0] if not icon_paid.empty else ''
-    else:
-        fig_paid = px.choropleth(None, locations=[], projection='natural earth')
-        fig_paid.update_geos(showframe=False, showcoastlines=True)
-        info_paid = "No paid apps available."
-        icon_paid = ''
-
-    return (fig_free, info_free, icon_free,
-            fig_paid, info_paid, icon_paid)
+    snapshot = snapshots.current()
+    return (app_frame(CHART_TYPE_FREE, snapshot.all_apps_free, snapshot.territory_counts_df_free, n) +
+            app_frame(CHART_TYPE_PAID, snapshot.all_apps_paid, snapshot.territory_counts_df_paid, n))
 
 @dash_app.callback(
-    Output('delivery-map', 'figure'),
-    Output('delivery-info', 'children'),
-    Input('delivery-interval', 'n_intervals'),
+    Output('overlap-heatmap', 'figure'),
+    Output('overlap-info', 'children'),
+    Input('overlap-chart-type', 'value'),
+    Input('snapshot-version', 'data'),
     prevent_initial_call=False
 )
-def update_delivery_map(n):
-    if not unique_hours_deliveries:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
+def update_overlap_heatmap(chart_type, version):
+    snapshot = snapshots.current()
+    matrix = snapshot.overlap_free if chart_type == CHART_TYPE_FREE else snapshot.overlap_paid
+    return create_overlap_heatmap(matrix, chart_type)
+
+def update_delivery_map(n, start_date=None, end_date=None, resolution='hour'):
+    snapshot = snapshots.current().delivery_feed.snapshot()
+    window = frame_window(snapshot.rollups, n or 0, resolution, start_date, end_date)
+    if window is None:
+        fig = choropleth_factory.empty()
         return fig, "No delivery data available."
 
-    current_hour = unique_hours_deliveries[n % len(unique_hours_deliveries)]
-    fig, info = create_delivery_choropleth(current_hour)
+    fig, info = create_delivery_choropleth(snapshot, *window, resolution)
     return fig, info
 
-@dash_app.callback(
-    Output('placement-map', 'figure'),
-    Output('placement-info', 'children'),
-    Input('placement-interval', 'n_intervals'),
-    prevent_initial_call=False
-)
-def update_placement_map(n):
-    if not unique_hours_placement:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
+def update_placement_map(n, start_date=None, end_date=None, resolution='hour'):
+    snapshot = snapshots.current().placement_feed.snapshot()
+    window = frame_window(snapshot.rollups, n or 0, resolution, start_date, end_date)
+    if window is None:
+        fig = choropleth_factory.empty()
         return fig, "No placement data available."
 
-    current_hour = unique_hours_placement[n % len(unique_hours_placement)]
-    fig, info = create_placement_choropleth(current_hour)
+    fig, info = create_placement_choropleth(snapshot, *window, resolution)
+    return fig, info
+
+def update_url_map(n, selected_url=None):
+    publisher_index = snapshots.current().publisher_index
+    if len(publisher_index) == 0:
+        fig = choropleth_factory.empty()
+        return fig, "No URL data available."
+
+    current_url = selected_url or publisher_index.url_at(n % len(publisher_index))
+    fig, info = create_publisher_choropleth(publisher_index, current_url)
+    return fig, info
+
+def update_advertiser_map(n, selected_url=None):
+    advertiser_index = snapshots.current().advertiser_index
+    if len(advertiser_index) == 0:
+        fig = choropleth_factory.empty()
+        return fig, "No AdvertiserURL data available."
+
+    current_advertiser_url = selected_url or advertiser_index.url_at(n % len(advertiser_index))
+    fig, info = create_advertiser_choropleth(advertiser_index, current_advertiser_url)
     return fig, info
 
+# Outputs of each section, in the order its update function returns them
+SECTION_OUTPUTS = {
+    'snapshot': [('histogram-free', 'figure'), ('histogram-paid', 'figure'), ('flow-sankey', 'figure'), ('snapshot-version', 'data')],
+    'apps': [('world-map-free', 'figure'), ('app-info-free', 'children'), ('app-icon-free', 'src'),
+             ('world-map-paid', 'figure'), ('app-info-paid', 'children'), ('app-icon-paid', 'src')],
+    'delivery': [('delivery-map', 'figure'), ('delivery-info', 'children')],
+    'placement': [('placement-map', 'figure'), ('placement-info', 'children')],
+    'url': [('url-map', 'figure'), ('url-info', 'children')],
+    'advertiser': [('advertiser-map', 'figure'), ('advertiser-info', 'children')],
+}
+
+# Sections re-rendered right away, outside their cadence, when one of these components changes
+SECTION_INPUTS = {
+    'ad-date-range': ('delivery', 'placement'),
+    'ad-resolution': ('delivery', 'placement'),
+    'url-select': ('url',),
+    'advertiser-select': ('advertiser',),
+}
+
+def section_frames(n, triggered_ids):
+    """
+    Return {section: frame index} for the sections to update at tick `n`.
+    A section advances one frame every SECTION_INTERVALS_MS[section] // TICK_MS ticks.
+    """
+    frames = {}
+    for section, interval_ms in SECTION_INTERVALS_MS.items():
+        ticks = max(interval_ms // TICK_MS, 1)
+        changed = any(section in SECTION_INPUTS.get(component_id, ()) for component_id in triggered_ids)
+        if not triggered_ids or changed or ('tick' in triggered_ids and n % ticks == 0):
+            frames[section] = n // ticks
+    return frames
+
 @dash_app.callback(
-    Output('url-map', 'figure'),
-    Output('url-info', 'children'),
-    Input('url-interval', 'n_intervals'),
+    [Output(component_id, prop) for outputs in SECTION_OUTPUTS.values() for component_id, prop in outputs],
+    Input('tick', 'n_intervals'),
+    Input('ad-date-range', 'start_date'),
+    Input('ad-date-range', 'end_date'),
+    Input('ad-resolution', 'value'),
+    Input('url-select', 'value'),
+    Input('advertiser-select', 'value'),
+    State('snapshot-version', 'data'),
     prevent_initial_call=False
 )
-def update_url_map(n):
-    if len(unique_urls) == 0:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
-        return fig, "No URL data available."
+def advance_sections(n, start_date, end_date, resolution, selected_url, selected_advertiser, shown_version):
+    """Update every section that is due on this tick, or whose own controls changed, in one round trip."""
+    frames = section_frames(n or 0, set(ctx.triggered_prop_ids.values()))
+    updates = {
+        'snapshot': lambda frame: refresh_snapshot_figures(frame, shown_version),
+        'apps': update_maps_and_icons,
+        'delivery': lambda frame: update_delivery_map(frame, start_date, end_date, resolution),
+        'placement': lambda frame: update_placement_map(frame, start_date, end_date, resolution),
+        'url': lambda frame: update_url_map(frame, selected_url),
+        'advertiser': lambda frame: update_advertiser_map(frame, selected_advertiser),
+    }
+
+    results = []
+    for section, outputs in SECTION_OUTPUTS.items():
+        if section not in frames:
+            results += [no_update] * len(outputs)
+            continue
+        try:
+            results += list(updates[section](frames[section]))
+        except PreventUpdate:
+            results += [no_update] * len(outputs)
+    return results
+
+def url_selector_options(index, search_value, page, selected_url):
+    """Return one page of ranked selector options, keeping the selected URL so the dropdown doesn't clear it."""
+    matches, page_count = index.search(search_value, page or 1, URL_PAGE_SIZE)
+    options = [{'label': f"{url} ({total:,})", 'value': url} for url, total in matches]
+    if selected_url and all(option['value'] != selected_url for option in options):
+        options.insert(0, {'label': selected_url, 'value': selected_url})
+    return options, page_count
 
-    current_url = unique_urls[n % len(unique_urls)]
-    fig, info = create_publisher_choropleth(current_url)
-    return fig, info
+@dash_app.callback(
+    Output('url-select', 'options'),
+    Output('url-pages', 'max_value'),
+    Input('url-select', 'search_value'),
+    Input('url-pages', 'active_page'),
+    State('url-select', 'value'),
+    prevent_initial_call=False
+)
+def update_url_options(search_value, page, selected_url):
+    return url_selector_options(snapshots.current().publisher_index, search_value, page, selected_url)
 
 @dash_app.callback(
-    Output('advertiser-map', 'figure'),
-    Output('advertiser-info', 'children'),
-    Input('advertiser-interval', 'n_intervals'),
+    Output('advertiser-select', 'options'),
+    Output('advertiser-pages', 'max_value'),
+    Input('advertiser-select', 'search_value'),
+    Input('advertiser-pages', 'active_page'),
+    State('advertiser-select', 'value'),
     prevent_initial_call=False
 )
-def update_advertiser_map(n):
-    if len(unique_advertiser_urls) == 0:
-        fig = px.choropleth(None, locations=[], projection='natural earth')
-        fig.update_geos(showframe=False, showcoastlines=True)
-        return fig, "No AdvertiserURL data available."
+def update_advertiser_options(search_value, page, selected_url):
+    return url_selector_options(snapshots.current().advertiser_index, search_value, page, selected_url)
 
-    current_advertiser_url = unique_advertiser_urls[n % len(unique_advertiser_urls)]
-    fig, info = create_advertiser_choropleth(current_advertiser_url)
-    return fig, info
+def start_feed_ingestor():
+    # Sources are looked up on every poll, so the ingestor follows the feeds of the current snapshot.
+    ingestor = FeedIngestor(poll_seconds=TAIL_POLL_SECONDS, sources=lambda: snapshots.current().tail_sources)
+    ingestor.start()
+    return ingestor
 
 def main(argv):
+    snapshots.start()
+    start_feed_ingestor()
     dash_app.run_server(debug=True)
 
 if __name__ == '__main__':
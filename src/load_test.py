@@ -0,0 +1,173 @@
+from collections import defaultdict
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import numpy as np
+import requests
+
+from benchmark_responses import callback_body, is_interval_callback, layout_values
+
+FLAGS = flags.FLAGS
+flags.DEFINE_string("url", None, "Base URL of a running dashboard to load. If unset, the dashboard is started locally against synthetic data.")
+flags.DEFINE_integer("port", 8051, "Port of the locally started dashboard.")
+flags.DEFINE_string("data_dir", None, "Directory for the synthetic data. Defaults to a temporary directory.")
+flags.DEFINE_integer("days", 7, "Days of synthetic hourly data.")
+flags.DEFINE_integer("sessions", 20, "Number of concurrent browser sessions to simulate.")
+flags.DEFINE_float("duration", 60.0, "Seconds to run the load for, after the ramp-up.")
+flags.DEFINE_float("ramp_up", 10.0, "Seconds over which the sessions are started.")
+flags.DEFINE_float("timeout", 30.0, "Per-request timeout in seconds.")
+
+LAYOUT = "layout"
+
+def serve(data_dir, port, days):
+    """Start the dashboard on `port` against the synthetic data in `data_dir`. Runs in a child process."""
+    from config import Config
+    from synthetic_data import write_synthetic_data
+
+    os.chdir(data_dir)
+    for name, path in write_synthetic_data(data_dir, days=days).items():
+        setattr(Config, name, path)
+    Config.AD_DB_PATH = os.path.join(data_dir, "ad_data.db")
+    Config.ICON_CACHE_DIR = os.path.join(data_dir, "icon_cache")
+
+    from werkzeug.serving import make_server
+    import launch
+
+    launch.snapshots.start()
+    launch.start_feed_ingestor()
+    make_server("127.0.0.1", port, launch.dash_app.server, threaded=True).serve_forever()
+
+def wait_until_up(base_url, timeout=300.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base_url, timeout=5).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"{base_url} did not come up within {timeout:.0f}s")
+
+class Stats:
+    """Latencies and errors per callback, shared by all session threads."""
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name, latency_ms, ok):
+        with self._lock:
+            self.latencies[name].append(latency_ms)
+            if not ok:
+                self.errors[name] += 1
+
+def timed(stats, name, send):
+    start = time.perf_counter()
+    try:
+        # 204 is a callback that raised PreventUpdate
+        ok = send().status_code in (200, 204)
+    except requests.RequestException:
+        ok = False
+    stats.record(name, (time.perf_counter() - start) * 1000, ok)
+
+def tick(base_url, output, spec, values, interval, start_at, stop_at, stats):
+    """
+    Post one interval callback the way a browser tab does: every `interval` seconds from `start_at`,
+    never more than one request in flight, and skipping the ticks that fire while waiting on a response.
+    """
+    http = requests.Session()
+    n = 0
+    next_tick = start_at
+    while next_tick < stop_at:
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+        body = callback_body(output, spec, n, values)
+        timed(stats, output, lambda: http.post(f"{base_url}/_dash-update-component", json=body, timeout=FLAGS.timeout))
+        n += 1
+        next_tick += interval
+        while next_tick < time.monotonic():
+            next_tick += interval
+            n += 1
+
+def session(base_url, callbacks, start_at, stop_at, stats):
+    """Simulate one browser tab: load the layout, then run all its interval callbacks until `stop_at`."""
+    time.sleep(max(0.0, start_at - time.monotonic()))
+    http = requests.Session()
+    timed(stats, LAYOUT, lambda: http.get(f"{base_url}/_dash-layout", timeout=FLAGS.timeout))
+    threads = []
+    for output, spec, values, interval in callbacks:
+        # Each tab's timers start at a random phase, like tabs opened at different times
+        phase = random.uniform(0, interval)
+        thread = threading.Thread(target=tick, args=(base_url, output, spec, values, interval, time.monotonic() + phase, stop_at, stats),
+                                  daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+def interval_schedule(base_url):
+    """Return (output, spec, layout values, interval in seconds) for every interval-driven callback of the app."""
+    values = layout_values(requests.get(f"{base_url}/_dash-layout", timeout=FLAGS.timeout).json())
+    dependencies = requests.get(f"{base_url}/_dash-dependencies", timeout=FLAGS.timeout).json()
+    callbacks = []
+    for spec in dependencies:
+        if not is_interval_callback(spec):
+            continue
+        interval_id = next(item["id"] for item in spec["inputs"] if item["property"] == "n_intervals")
+        interval = values.get((interval_id, "interval"), 1000) / 1000
+        callbacks.append((spec["output"], spec, values, interval))
+    return callbacks
+
+def report(stats, elapsed):
+    logging.info(f"{'callback':<44} | {'requests':>8} | {'req/s':>7} | {'p50 ms':>8} | {'p99 ms':>8} | {'errors':>7}")
+    logging.info("-" * 96)
+    for name in sorted(stats.latencies, key=lambda name: (name != LAYOUT, name)):
+        latencies = np.array(stats.latencies[name])
+        error_rate = stats.errors[name] / len(latencies)
+        logging.info(f"{name[:44]:<44} | {len(latencies):8d} | {len(latencies) / elapsed:7.1f} | "
+                     f"{np.percentile(latencies, 50):8.1f} | {np.percentile(latencies, 99):8.1f} | {error_rate:7.2%}")
+    total = sum(len(latencies) for latencies in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    logging.info(f"Total: {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), {errors} errors.")
+
+def main(argv):
+    server = None
+    base_url = FLAGS.url
+    if base_url is None:
+        data_dir = FLAGS.data_dir or tempfile.mkdtemp(prefix="app_show_load_")
+        logging.info(f"Starting the dashboard on port {FLAGS.port} with synthetic data in {data_dir}...")
+        server = multiprocessing.Process(target=serve, args=(data_dir, FLAGS.port, FLAGS.days), daemon=True)
+        server.start()
+        base_url = f"http://127.0.0.1:{FLAGS.port}"
+    base_url = base_url.rstrip("/")
+
+    try:
+        wait_until_up(base_url)
+        callbacks = interval_schedule(base_url)
+        logging.info(f"Simulating {FLAGS.sessions} sessions x {len(callbacks)} interval callbacks for {FLAGS.duration:.0f}s...")
+
+        stats = Stats()
+        start = time.monotonic()
+        stop_at = start + FLAGS.ramp_up + FLAGS.duration
+        sessions = [
+            threading.Thread(target=session, args=(base_url, callbacks, start + i * FLAGS.ramp_up / FLAGS.sessions, stop_at, stats),
+                             daemon=True)
+            for i in range(FLAGS.sessions)
+        ]
+        for thread in sessions:
+            thread.start()
+        for thread in sessions:
+            thread.join()
+        report(stats, time.monotonic() - start)
+    finally:
+        if server is not None:
+            server.terminate()
+
+if __name__ == "__main__":
+    app.run(main)
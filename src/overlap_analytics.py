@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from config import Config
+
+class AppCountryMatrix:
+    """
+    Sparse app x country incidence matrix of a top-apps chart: entry (i, j) is 1 when app i
+    is in the chart of country j. Built in one pass over the chart rows; all metrics are
+    sparse matrix products rather than per-app queries.
+    """
+    def __init__(self, apps: List[str], countries: List[str], matrix: sparse.csr_matrix):
+        self.apps = apps
+        self.countries = countries
+        self.matrix = matrix
+
+    @classmethod
+    def from_rows(cls, rows: pd.DataFrame, countries: Optional[List[str]] = None) -> "AppCountryMatrix":
+        """Build the matrix from (app_name, country) rows. Countries default to Config.TERRITORIES, in that order."""
+        countries = list(countries if countries is not None else Config.TERRITORIES)
+        extra = sorted(set(rows['country']) - set(countries))
+        countries += extra
+
+        app_codes, apps = pd.factorize(rows['app_name'], sort=True)
+        country_codes = pd.Categorical(rows['country'], categories=countries).codes
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (app_codes, country_codes)),
+            shape=(len(apps), len(countries))
+        )
+        # Duplicate (app, country) rows are summed on construction; incidence only cares about presence.
+        matrix.data[:] = 1
+        return cls(list(apps), countries, matrix)
+
+    @classmethod
+    def by_date(cls, rows: pd.DataFrame, countries: Optional[List[str]] = None) -> Dict[str, "AppCountryMatrix"]:
+        """Build one matrix per fetched_date from (app_name, country, fetched_date) rows."""
+        return {date: cls.from_rows(group, countries) for date, group in rows.groupby('fetched_date')}
+
+    def territory_counts(self) -> pd.Series:
+        """Number of countries each app is charted in, largest first."""
+        counts = np.asarray(self.matrix.sum(axis=1)).ravel()
+        return pd.Series(counts, index=self.apps, name='territory_count').sort_values(ascending=False)
+
+    def country_overlap(self) -> pd.DataFrame:
+        """Number of apps each pair of countries has in common (the diagonal is each country's chart size)."""
+        shared = (self.matrix.T @ self.matrix).toarray()
+        return pd.DataFrame(shared, index=self.countries, columns=self.countries)
+
+    def jaccard(self) -> pd.DataFrame:
+        """Jaccard similarity of every pair of country charts: shared apps / apps in either chart."""
+        shared = (self.matrix.T @ self.matrix).toarray().astype(np.float64)
+        sizes = np.diag(shared)
+        union = sizes[:, None] + sizes[None, :] - shared
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = np.where(union > 0, shared / union, 0.0)
+        return pd.DataFrame(similarity, index=self.countries, columns=self.countries)
+
+    def app_cooccurrence(self, top: Optional[int] = None) -> pd.DataFrame:
+        """
+        Number of countries in which each pair of apps is charted together.
+        If `top` is given, only the `top` apps by territory count are included.
+        """
+        matrix, apps = self.matrix, self.apps
+        if top is not None:
+            order = np.argsort(-np.asarray(matrix.sum(axis=1)).ravel(), kind='stable')[:top]
+            matrix, apps = matrix[order], [apps[i] for i in order]
+        together = (matrix @ matrix.T).toarray()
+        return pd.DataFrame(together, index=apps, columns=apps)
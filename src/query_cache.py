@@ -0,0 +1,39 @@
+from collections import OrderedDict
+import threading
+from typing import Any, Hashable
+
+MISS = object()
+
+class QueryCache:
+    """
+    Bounded LRU cache of query results. Each entry is tagged with the data version it was
+    read at, and only counts as a hit while that version is still current, so invalidation
+    is exact without having to clear anything.
+    """
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Any:
+        """Return the value cached for `key` at `version`, or MISS."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,150 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ad_data import from_hour_index
+
+RESOLUTIONS = {
+    'hour': pd.Timedelta(hours=1),
+    'day': pd.Timedelta(days=1),
+    'week': pd.Timedelta(weeks=1),
+}
+
+def floor_to(timestamps, resolution):
+    """Floor timestamps (a Timestamp or a datetime Series) to the start of their hour, day or week (Monday)."""
+    accessor = timestamps.dt if isinstance(timestamps, pd.Series) else timestamps
+    if resolution == 'hour':
+        return accessor.floor('h')
+    day = accessor.floor('D')
+    if resolution == 'day':
+        return day
+    return day - pd.to_timedelta(accessor.dayofweek, unit='D')
+
+def ceil_to(timestamp, resolution):
+    floored = floor_to(timestamp, resolution)
+    return floored if floored == timestamp else floored + RESOLUTIONS[resolution]
+
+class RollupLevel(NamedTuple):
+    buckets: np.ndarray
+    # Row i holds the per-country totals of all buckets before bucket i
+    cumulative: np.ndarray
+    max_value: float
+
+class Rollups:
+    """
+    Hour, day and week rollups of a compact hourly feed, pre-aggregated per country at load time.
+    Each level keeps prefix sums over its buckets, so a contiguous run of buckets is summed with
+    one subtraction. A range is split into at most five runs (leading hours, leading days, whole
+    weeks, trailing days, trailing hours), each served from the coarsest rollup that fits it, so a
+    query costs the same for a month as for an hour.
+    """
+    def __init__(self, data: pd.DataFrame, value_column: str):
+        self.value_column = value_column
+        df = data.dropna(subset=['alpha_3'])
+        codes, countries = pd.factorize(df['alpha_3'].to_numpy())
+        self.countries = np.asarray(countries, dtype=object)
+        values = df[value_column].to_numpy()
+        hours = pd.Series(from_hour_index(df['HourIndex'].to_numpy()))
+        # Sum in 64 bits whatever the stored (downcast) count type is
+        dtype = np.result_type(values.dtype, np.int64) if len(values) else np.int64
+
+        self.levels: Dict[str, RollupLevel] = {}
+        for resolution in RESOLUTIONS:
+            bucket_codes, buckets = pd.factorize(floor_to(hours, resolution), sort=True)
+            totals = np.zeros((len(buckets), len(self.countries)), dtype=dtype)
+            np.add.at(totals, (bucket_codes, codes), values)
+            cumulative = np.zeros((len(buckets) + 1, len(self.countries)), dtype=totals.dtype)
+            np.cumsum(totals, axis=0, out=cumulative[1:])
+            self.levels[resolution] = RollupLevel(
+                buckets=np.asarray(buckets, dtype='datetime64[ns]'),
+                cumulative=cumulative,
+                max_value=totals.max() if totals.size else 0
+            )
+
+    def extended(self, data: pd.DataFrame) -> 'Rollups':
+        """
+        Return new rollups with the values of `data` added. Only the buckets from the earliest one
+        `data` touches onward are recomputed, so folding in the latest hours of a live feed costs
+        the same however much history is loaded. The current rollups are left untouched.
+        """
+        df = data.dropna(subset=['alpha_3'])
+        if df.empty:
+            return self
+        alpha_3 = df['alpha_3'].to_numpy()
+        added = pd.unique(alpha_3[~pd.Series(alpha_3).isin(self.countries).to_numpy()])
+        countries = np.concatenate([self.countries, np.asarray(added, dtype=object)]) if len(added) else self.countries
+        codes = pd.Index(countries).get_indexer(alpha_3)
+        values = df[self.value_column].to_numpy().astype(np.int64)
+        hours = pd.Series(from_hour_index(df['HourIndex'].to_numpy()))
+
+        rollups = Rollups.__new__(Rollups)
+        rollups.value_column = self.value_column
+        rollups.countries = countries
+        rollups.levels = {}
+        for resolution, level in self.levels.items():
+            new_codes, new_buckets = pd.factorize(floor_to(hours, resolution), sort=True)
+            new_buckets = np.asarray(new_buckets, dtype='datetime64[ns]')
+            buckets = np.union1d(level.buckets, new_buckets) if not np.isin(new_buckets, level.buckets).all() else level.buckets
+
+            # Rows up to the first touched bucket are unchanged; the rest are rebuilt from the old
+            # per-bucket totals plus the new values.
+            first = np.searchsorted(buckets, new_buckets[0])
+            old_first = np.searchsorted(level.buckets, new_buckets[0])
+            old_cumulative = level.cumulative
+            if len(countries) > old_cumulative.shape[1]:
+                old_cumulative = np.pad(old_cumulative, ((0, 0), (0, len(countries) - old_cumulative.shape[1])))
+            totals = np.zeros((len(buckets) - first, len(countries)), dtype=old_cumulative.dtype)
+            totals[np.searchsorted(buckets, level.buckets[old_first:]) - first] = np.diff(old_cumulative[old_first:], axis=0)
+            np.add.at(totals, (np.searchsorted(buckets, new_buckets)[new_codes] - first, codes), values)
+
+            cumulative = np.empty((len(buckets) + 1, len(countries)), dtype=totals.dtype)
+            cumulative[:first + 1] = old_cumulative[:first + 1]
+            np.cumsum(totals, axis=0, out=cumulative[first + 1:])
+            cumulative[first + 1:] += cumulative[first]
+            rollups.levels[resolution] = RollupLevel(
+                buckets=buckets,
+                cumulative=cumulative,
+                max_value=max(level.max_value, totals.max())
+            )
+        return rollups
+
+    def __len__(self) -> int:
+        """Number of hours with data."""
+        return len(self.levels['hour'].buckets)
+
+    @property
+    def nbytes(self) -> int:
+        return self.countries.nbytes + sum(level.buckets.nbytes + level.cumulative.nbytes for level in self.levels.values())
+
+    def buckets(self, resolution: str, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> List[pd.Timestamp]:
+        """Return the start of every bucket of `resolution` with data that overlaps [start, end)."""
+        buckets = self.levels[resolution].buckets
+        lo = 0 if start is None else np.searchsorted(buckets, np.datetime64(floor_to(start, resolution)), 'left')
+        hi = len(buckets) if end is None else np.searchsorted(buckets, np.datetime64(end), 'left')
+        return [pd.Timestamp(bucket) for bucket in buckets[lo:hi]]
+
+    def max_value(self, resolution: str) -> float:
+        """Largest single-country total of any bucket of `resolution`."""
+        return self.levels[resolution].max_value
+
+    def _sum(self, resolution: str, start: pd.Timestamp, end: pd.Timestamp) -> np.ndarray:
+        level = self.levels[resolution]
+        lo, hi = np.searchsorted(level.buckets, [np.datetime64(start), np.datetime64(end)], 'left')
+        return level.cumulative[hi] - level.cumulative[lo]
+
+    def query(self, start: pd.Timestamp, end: pd.Timestamp) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the (alpha_3, total) of every country with data in [start, end)."""
+        start, end = floor_to(start, 'hour'), ceil_to(end, 'hour')
+        day_start = min(ceil_to(start, 'day'), end)
+        day_end = max(floor_to(end, 'day'), day_start)
+        week_start = min(ceil_to(day_start, 'week'), day_end)
+        week_end = max(floor_to(day_end, 'week'), week_start)
+
+        totals = (self._sum('hour', start, day_start) +
+                  self._sum('day', day_start, week_start) +
+                  self._sum('week', week_start, week_end) +
+                  self._sum('day', week_end, day_end) +
+                  self._sum('hour', day_end, end))
+        present = totals > 0
+        return self.countries[present], totals[present]
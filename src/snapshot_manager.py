@@ -0,0 +1,48 @@
+import threading
+from typing import Any, Callable, Hashable
+
+from absl import logging
+
+class SnapshotManager(threading.Thread):
+    """
+    Holds the current immutable data snapshot and rebuilds it in the background whenever
+    the data version changes. The new snapshot is built while the current one keeps serving
+    and is then swapped in with a single assignment, so readers never block on a reload and
+    at most two snapshots are alive at a time.
+    """
+    def __init__(self, build: Callable[[Hashable], Any], version: Callable[[], Hashable], poll_seconds: float = 30.0):
+        super().__init__(name="snapshot-manager", daemon=True)
+        self._build = build
+        self._version = version
+        self.poll_seconds = poll_seconds
+        self._stop_event = threading.Event()
+
+        self._current_version = self._version()
+        self._current = self._build(self._current_version)
+
+    def current(self) -> Any:
+        """Return the snapshot callbacks should read from. Hold on to it for the whole callback."""
+        return self._current
+
+    def refresh(self) -> bool:
+        """Rebuild and swap in a new snapshot if the data version changed. Returns True on swap."""
+        version = self._version()
+        if version == self._current_version:
+            return False
+
+        logging.info(f"Data version changed to {version}. Building a new snapshot...")
+        snapshot = self._build(version)
+        self._current = snapshot
+        self._current_version = version
+        logging.info("Swapped in the new snapshot.")
+        return True
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Failed to build a new snapshot. Keeping the current one: {e}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
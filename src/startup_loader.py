@@ -0,0 +1,135 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from absl import logging
+
+class SharedResult(NamedTuple):
+    """A task result pickled with its array buffers out-of-band in one shared memory segment."""
+    pickled: bytes
+    segment: Optional[str]
+    sizes: Tuple[int, ...]
+
+def share(result: Any) -> SharedResult:
+    """
+    Pickle `result` with protocol 5, placing the numpy buffers behind its DataFrames and arrays
+    in shared memory, so they reach the parent with one memcpy instead of through the result pipe.
+    """
+    buffers = []
+    pickled = pickle.dumps(result, protocol=5, buffer_callback=buffers.append)
+    views = [buffer.raw() for buffer in buffers]
+    sizes = tuple(view.nbytes for view in views)
+    if not buffers:
+        return SharedResult(pickled, None, ())
+    if not sum(sizes):
+        return SharedResult(pickle.dumps(result, protocol=5), None, ())
+
+    segment = SharedMemory(create=True, size=sum(sizes))
+    offset = 0
+    for view in views:
+        segment.buf[offset:offset + view.nbytes] = view
+        offset += view.nbytes
+    segment.close()
+    return SharedResult(pickled, segment.name, sizes)
+
+def receive(shared: SharedResult) -> Any:
+    """Rebuild a shared result in this process and free its segment."""
+    if shared.segment is None:
+        return pickle.loads(shared.pickled)
+    segment = SharedMemory(name=shared.segment)
+    try:
+        buffers, offset = [], 0
+        for size in shared.sizes:
+            buffers.append(bytearray(segment.buf[offset:offset + size]))
+            offset += size
+        return pickle.loads(shared.pickled, buffers=buffers)
+    finally:
+        segment.close()
+        segment.unlink()
+
+# The tasks of the running loader. Forked workers inherit them, so only task names and
+# results cross the pipe: unpickling a function of a module that is still being imported
+# (e.g. launch, which loads its data at import time) would block on its import lock.
+_tasks: Dict[str, Tuple[Callable, tuple, Tuple[str, ...]]] = {}
+
+def run_task(name: str, results: tuple) -> Tuple[SharedResult, float]:
+    func, args, _ = _tasks[name]
+    start = time.perf_counter()
+    result = func(*args, *results)
+    return share(result), time.perf_counter() - start
+
+class StartupLoader:
+    """
+    Runs independent loading tasks as a dependency graph on a pool of forked worker processes,
+    starting each task as soon as the tasks it depends on are done, so loading takes about as
+    long as the slowest chain of tasks instead of the sum of all of them.
+    Task functions receive their own arguments followed by the results of the tasks they depend on.
+    The pool is only forked while the process is single-threaded (e.g. at startup, before the
+    server and background threads run); otherwise, or with one worker, tasks run inline in order.
+    """
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or multiprocessing.cpu_count()
+        self._tasks: Dict[str, Tuple[Callable, tuple, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: Callable, *args, after: Tuple[str, ...] = ()) -> None:
+        """Add task `name` computing func(*args, *results of `after`)."""
+        self._tasks[name] = (func, args, tuple(after))
+
+    def _ready(self, pending: Dict, results: Dict) -> List[str]:
+        return [name for name, (_, _, after) in pending.items() if all(dep in results for dep in after)]
+
+    def _can_fork(self) -> bool:
+        return (self.workers > 1 and len(self._tasks) > 1 and threading.active_count() == 1
+                and "fork" in multiprocessing.get_all_start_methods())
+
+    def run(self) -> Dict[str, Any]:
+        """Run every task and return {name: result}."""
+        start = time.perf_counter()
+        pending, results, durations = dict(self._tasks), {}, {}
+        if self._can_fork():
+            self._run_pool(pending, results, durations)
+        else:
+            while pending:
+                ready = self._ready(pending, results)
+                if not ready:
+                    raise ValueError(f"Tasks with missing or circular dependencies: {sorted(pending)}")
+                for name in ready:
+                    func, args, after = pending.pop(name)
+                    task_start = time.perf_counter()
+                    results[name] = func(*args, *(results[dep] for dep in after))
+                    durations[name] = time.perf_counter() - task_start
+
+        elapsed = time.perf_counter() - start
+        logging.info(f"Loaded {len(results)} datasets in {elapsed:.2f}s "
+                     f"({sum(durations.values()):.2f}s of task time, slowest: "
+                     f"{max(durations, key=durations.get, default='-')} {max(durations.values(), default=0):.2f}s).")
+        return results
+
+    def _run_pool(self, pending: Dict, results: Dict, durations: Dict) -> None:
+        # Start the tracker before forking, so the workers register their segments with the same
+        # tracker that sees the parent unlink them.
+        resource_tracker.ensure_running()
+        # With fork, the pool starts all its workers on the first submit, so they see every task
+        _tasks.update(self._tasks)
+        try:
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(pending)), mp_context=context) as pool:
+                running = {}
+                while pending or running:
+                    for name in self._ready(pending, results):
+                        _, _, after = pending.pop(name)
+                        running[pool.submit(run_task, name, tuple(results[dep] for dep in after))] = name
+                    if not running:
+                        raise ValueError(f"Tasks with missing or circular dependencies: {sorted(pending)}")
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        shared, durations[name] = future.result()
+                        results[name] = receive(shared)
+        finally:
+            _tasks.clear()
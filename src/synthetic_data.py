@@ -0,0 +1,67 @@
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from app_entry import AppEntry
+from config import Config
+from database_manager import DatabaseManager
+
+def write_synthetic_data(directory: str, days: int = 7, urls: int = 500, apps: int = 300, seed: int = 0) -> Dict[str, str]:
+    """
+    Write a synthetic copy of every dashboard dataset into `directory`: hourly delivery and
+    placement CSVs covering `days` days, publisher/advertiser/flow CSVs over `urls` URLs,
+    and a top-apps database charting `apps` apps in every territory.
+    Returns the written paths, keyed like the Config attributes they stand in for.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "DB_PATH": os.path.join(directory, "hackathon.db"),
+        "CSV_PATH_DELIVERIES": os.path.join(directory, "delivery_data.csv"),
+        "CSV_PATH_PLACEMENTS": os.path.join(directory, "placement_data.csv"),
+        "CSV_PATH_PUBLISHER": os.path.join(directory, "publisher_data.csv"),
+        "CSV_PATH_ADVERTISER": os.path.join(directory, "advertiser_data.csv"),
+        "CSV_PATH_FLOW": os.path.join(directory, "flow_data.csv"),
+    }
+    geo_codes = [territory.upper() for territory in Config.TERRITORIES]
+
+    hours = pd.date_range(pd.Timestamp.today().normalize() - pd.Timedelta(days=days), periods=days * 24, freq="h")
+    hourly = pd.MultiIndex.from_product([hours, geo_codes], names=["EventHour", "GeoCode"]).to_frame(index=False)
+    hourly["EventDate"] = hourly["EventHour"].dt.strftime("%Y-%m-%d")
+    hourly["EventHour"] = hourly["EventHour"].dt.strftime("%Y-%m-%d %H")
+    for path, value_column in ((paths["CSV_PATH_DELIVERIES"], "Deliveries"), (paths["CSV_PATH_PLACEMENTS"], "PlacementCount")):
+        hourly[value_column] = rng.integers(1, 1000, len(hourly))
+        hourly[["EventDate", "EventHour", "GeoCode", value_column]].to_csv(path, index=False)
+        hourly = hourly.drop(columns=[value_column])
+
+    dates = sorted(hourly["EventDate"].unique())
+    for path, url_column, name in ((paths["CSV_PATH_PUBLISHER"], "PublisherURL", "publisher"),
+                                   (paths["CSV_PATH_ADVERTISER"], "AdvertiserURL", "advertiser")):
+        rows = urls * 20
+        pd.DataFrame({
+            "EventDate": rng.choice(dates, rows),
+            url_column: [f"https://{name}{i}.example.com" for i in rng.integers(0, urls, rows)],
+            "GeoCode": rng.choice(geo_codes, rows),
+            "Count": rng.integers(1, 500, rows),
+        }).to_csv(path, index=False)
+
+    flows = min(urls, 200)
+    pd.DataFrame({
+        "AdvertizerURL": [f"https://advertiser{i}.example.com" for i in rng.integers(0, 20, flows)],
+        "PublisherURL": [f"https://publisher{i}.example.com" for i in rng.integers(0, 30, flows)],
+        "count": rng.integers(1, 100, flows),
+    }).to_csv(paths["CSV_PATH_FLOW"], index=False)
+
+    if os.path.exists(paths["DB_PATH"]):
+        os.remove(paths["DB_PATH"])
+    names = [f"Synthetic App {i}" for i in range(apps)]
+    entries = []
+    for country in Config.TERRITORIES:
+        for chart_type in Config.CHART_TYPES:
+            for rank, i in enumerate(rng.choice(apps, min(Config.LIMIT, apps), replace=False), start=1):
+                entries.append(AppEntry(rank=rank, app_name=names[i], artist="Synthetic", icon_url="",
+                                        country=country, chart_type=chart_type, fetched_date=dates[-1]))
+    DatabaseManager(paths["DB_PATH"]).store_apps(entries)
+    return paths
@@ -6,11 +6,24 @@ from config import Config
 from database_manager import DatabaseManager
 from apple_marketing_tools import AppStoreAPIClient
 from chart_service import ChartService
-from util import update_all_charts, display_all_charts
+from util import create_update_jobs, update_all_charts, display_all_charts, prefetch_all_icons
 
 FLAGS = flags.FLAGS
 flags.DEFINE_string("db_path", Config.DB_PATH, "Path to the SQLite database.")
 flags.DEFINE_integer("limit", Config.LIMIT, "Limit of apps to fetch.")
+flags.DEFINE_string("icon_cache_dir", Config.ICON_CACHE_DIR, "Directory of the dashboard's icon thumbnail cache.")
+flags.DEFINE_boolean("prefetch_icons", True, "Fetch the icons of the latest charts into the icon cache.")
+flags.DEFINE_integer("workers", 1, "Number of worker processes claiming charts to update.")
+flags.DEFINE_string("worker_id", None, "Lease owner name of this worker. Defaults to host:pid.")
+flags.DEFINE_integer("lease_seconds", 120, "How long a claimed chart is reserved before other workers may retry it.")
+flags.DEFINE_integer("retry_seconds", 60, "Delay before a failed chart is retried, multiplied by the attempts made so far.")
+
+def run_worker(db_path, limit, worker_id, lease_seconds, job_date, retry_seconds):
+    Config.DB_PATH = db_path
+    Config.LIMIT = limit
+    chart_service = ChartService(DatabaseManager(db_path), AppStoreAPIClient())
+    update_all_charts(chart_service, worker_id=worker_id, lease_seconds=lease_seconds,
+                      job_date=job_date, retry_seconds=retry_seconds)
 
 def main(argv):
     logging.info(f"Args: {argv}")
@@ -19,11 +32,32 @@ def main(argv):
     if FLAGS.limit:
         Config.LIMIT = FLAGS.limit
 
-    db_manager = DatabaseManager()
+    # DatabaseManager's default path is bound at import, before the flags are applied
+    db_manager = DatabaseManager(Config.DB_PATH)
     api_client = AppStoreAPIClient()
     chart_service = ChartService(db_manager, api_client)
 
-    update_all_charts(chart_service)
+    # Jobs are created once per run, so charts that failed in an earlier run are retried
+    job_date = create_update_jobs(db_manager)
+    if FLAGS.workers > 1:
+        import multiprocessing
+
+        workers = [multiprocessing.Process(target=run_worker,
+                                           args=(Config.DB_PATH, Config.LIMIT,
+                                                 f"{FLAGS.worker_id}-{i}" if FLAGS.worker_id else None,
+                                                 FLAGS.lease_seconds, job_date, FLAGS.retry_seconds))
+                   for i in range(FLAGS.workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    else:
+        update_all_charts(chart_service, worker_id=FLAGS.worker_id, lease_seconds=FLAGS.lease_seconds,
+                          job_date=job_date, retry_seconds=FLAGS.retry_seconds)
+    if FLAGS.prefetch_icons:
+        from icon_cache import IconCache
+
+        prefetch_all_icons(db_manager, IconCache(FLAGS.icon_cache_dir))
     display_all_charts(chart_service)
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ad_data import downcast_counts
+
+class UrlIndex:
+    """
+    Per-URL index over a publisher/advertiser dataset, built once at load time.
+    Rows are summed per (URL, alpha_3) and sorted by URL, so each URL owns one contiguous
+    slice of the country-code and value arrays and a lookup is a dict access plus two slices.
+    URLs are also ranked by total volume for cycling and paged searches.
+    """
+    def __init__(self, data: pd.DataFrame, url_column: str, value_column: str = 'Count'):
+        df = data.dropna(subset=['alpha_3'])
+        df = df.groupby([url_column, 'alpha_3'], as_index=False, sort=True, observed=True)[value_column].sum()
+
+        urls = np.asarray(df[url_column], dtype=object)
+        # Countries are held as small integer codes into a table of the distinct alpha_3 values
+        alpha_3 = pd.Categorical(df['alpha_3']).remove_unused_categories()
+        self._countries = np.asarray(alpha_3.categories, dtype=object)
+        self._codes = alpha_3.codes
+        values = df[value_column].to_numpy(dtype=np.int64)
+        self._values = downcast_counts(df[value_column]).to_numpy()
+
+        if len(urls):
+            boundaries = np.flatnonzero(urls[1:] != urls[:-1]) + 1
+            starts = np.concatenate(([0], boundaries))
+            stops = np.concatenate((boundaries, [len(urls)]))
+            totals = np.add.reduceat(values, starts)
+        else:
+            starts = stops = totals = np.array([], dtype=np.int64)
+
+        unique_urls = urls[starts]
+        self._slices = {url: (start, stop) for url, start, stop in zip(unique_urls.tolist(), starts.tolist(), stops.tolist())}
+
+        order = np.argsort(-totals, kind='stable')
+        self._ranked_urls: List[str] = unique_urls[order].tolist()
+        self._ranked_totals: List[int] = totals[order].tolist()
+        self._ranked_lower = [url.lower() for url in self._ranked_urls]
+
+    def __len__(self) -> int:
+        return len(self._ranked_urls)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by the index, including its URL strings and lookup tables."""
+        arrays = sum(array.nbytes for array in (self._countries, self._codes, self._values))
+        strings = sum(sys.getsizeof(url) for url in self._ranked_urls + self._ranked_lower + self._countries.tolist())
+        containers = (sys.getsizeof(self._slices) + len(self._slices) * sys.getsizeof((0, 0)) +
+                      sum(sys.getsizeof(items) for items in (self._ranked_urls, self._ranked_totals, self._ranked_lower)))
+        return arrays + strings + containers
+
+    def lookup(self, url: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return the (alpha_3, value) arrays for `url`, or None if the URL is unknown."""
+        bounds = self._slices.get(url)
+        if bounds is None:
+            return None
+        start, stop = bounds
+        return self._countries[self._codes[start:stop]], self._values[start:stop]
+
+    def url_at(self, rank: int) -> str:
+        """Return the URL at the given rank, with rank 0 being the URL with the highest total volume."""
+        return self._ranked_urls[rank]
+
+    def search(self, query: Optional[str] = None, page: int = 1, page_size: int = 50) -> Tuple[List[Tuple[str, int]], int]:
+        """
+        Return one page of (URL, total) pairs matching `query` as a case-insensitive substring,
+        ordered by total volume, together with the number of pages.
+        """
+        if query:
+            query = query.lower()
+            matches = [i for i, url in enumerate(self._ranked_lower) if query in url]
+        else:
+            matches = range(len(self._ranked_urls))
+
+        page_count = max(1, -(-len(matches) // page_size))
+        page = min(max(page, 1), page_count)
+        selected = matches[(page - 1) * page_size:page * page_size]
+        return [(self._ranked_urls[i], self._ranked_totals[i]) for i in selected], page_count
@@ -1,17 +1,74 @@
+from datetime import datetime
+import os
+import socket
 import time
+from typing import TYPE_CHECKING
 
 from absl import logging
 
 from config import Config
-from chart_service import ChartService
 
-def update_all_charts(chart_service: ChartService):
-    for territory in Config.TERRITORIES:
-        for chart_type in Config.CHART_TYPES:
-            if chart_service.update_chart_data(territory, chart_type):
-                time.sleep(10)
+if TYPE_CHECKING:
+    from chart_service import ChartService
+    from database_manager import DatabaseManager
+    from icon_cache import IconCache
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def create_update_jobs(db_manager: "DatabaseManager") -> str:
+    """Journal today's (territory, chart_type) updates in the DB and return today's job date."""
+    job_date = datetime.utcnow().strftime(Config.DATE_FORMAT)
+    db_manager.create_update_jobs(job_date, [(territory, chart_type)
+                                             for territory in Config.TERRITORIES
+                                             for chart_type in Config.CHART_TYPES])
+    return job_date
+
+def update_all_charts(chart_service: "ChartService", worker_id: str = None, lease_seconds: float = 120,
+                      job_date: str = None, retry_seconds: float = 60):
+    """
+    Work through today's (territory, chart_type) journal in the DB until nothing is left to claim.
+    A killed run resumes where it stopped, and several workers sharing the DB split the work between them.
+    Failed charts are retried after a delay. Once no chart of the day is left pending or running,
+    the day is published to the dashboard. Pass the `job_date` of jobs already created by
+    create_update_jobs to share them between workers; otherwise they are created here.
+    """
+    db_manager = chart_service.db_manager
+    worker_id = worker_id or default_worker_id()
+    if job_date is None:
+        job_date = create_update_jobs(db_manager)
+
+    while True:
+        job = db_manager.claim_update_job(job_date, worker_id, lease_seconds)
+        if job is None:
+            retry_at = db_manager.next_update_retry(job_date)
+            if retry_at is None:
+                break
+            time.sleep(max(0.0, retry_at - time.time()))
+            continue
+        territory, chart_type = job
+        try:
+            fetched = chart_service.update_chart_data(territory, chart_type)
+        except Exception as e:
+            logging.error(f"Failed to update {territory.upper()} {chart_type}: {e}")
+            db_manager.finish_update_job(job_date, territory, chart_type, worker_id, succeeded=False,
+                                         retry_seconds=retry_seconds)
+            continue
+        db_manager.finish_update_job(job_date, territory, chart_type, worker_id, succeeded=True)
+        if fetched:
+            time.sleep(10)
+
+    logging.info(f"Update progress for {job_date}: {db_manager.get_update_progress(job_date)}")
+    # Other workers may still be running; the last one to finish publishes the day
+    if db_manager.publish_update(job_date):
+        logging.info(f"Published the charts of {job_date}.")
+
+def prefetch_all_icons(db_manager: "DatabaseManager", icon_cache: "IconCache"):
+    icon_urls = db_manager.fetch_latest_icon_urls()
+    fetched = icon_cache.prefetch(icon_urls)
+    logging.info(f"Prefetched {fetched} new icons ({len(icon_urls)} in the latest charts).")
 
-def display_all_charts(chart_service: ChartService):
+def display_all_charts(chart_service: "ChartService"):
     for territory in Config.TERRITORIES:
         logging.info(f"\n=== {territory.upper()} Data ===")
         for chart in Config.CHART_TYPES:
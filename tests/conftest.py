@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# The modules live flat in src/ and import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+@pytest.fixture(scope="session")
+def launch(tmp_path_factory):
+    """The dashboard module, loaded against a small synthetic copy of every dataset."""
+    from config import Config
+    from synthetic_data import write_synthetic_data
+
+    data_dir = str(tmp_path_factory.mktemp("data"))
+    for name, path in write_synthetic_data(data_dir, days=2, urls=50, apps=60).items():
+        setattr(Config, name, path)
+    Config.AD_DB_PATH = os.path.join(data_dir, "ad_data.db")
+    Config.ICON_CACHE_DIR = os.path.join(data_dir, "icon_cache")
+
+    # launch opens the top-apps DB relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        import launch
+        yield launch
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,84 @@
+import os
+
+import pandas as pd
+
+from ad_data_store import AdDataStore, StoreTailer
+from feed_ingestor import FeedIngestor, HourlyFeed
+
+def deliveries(days):
+    hours = pd.date_range("2024-01-01", periods=days * 24, freq="h")
+    return pd.DataFrame({
+        "EventDate": hours.strftime("%Y-%m-%d"),
+        "EventHour": hours,
+        "GeoCode": "US",
+        "alpha_3": "USA",
+        "Deliveries": 1,
+    })
+
+def test_load_keeps_only_the_latest_days(tmp_path):
+    store = AdDataStore(str(tmp_path / "ad_data.db"))
+    store.store_rows("deliveries", deliveries(days=5))
+
+    assert len(store.load("deliveries")) == 5 * 24
+    recent = store.load("deliveries", days=2)
+    assert sorted(recent["EventDate"].unique()) == ["2024-01-04", "2024-01-05"]
+    assert len(recent) == 2 * 24
+
+def test_rows_are_summed_on_write(tmp_path):
+    store = AdDataStore(str(tmp_path / "ad_data.db"))
+    store.store_rows("deliveries", deliveries(days=1))
+    store.store_rows("deliveries", deliveries(days=1))
+    assert (store.load("deliveries")["Deliveries"] == 2).all()
+
+def test_ingest_resumes_only_in_the_file_it_stopped_in(tmp_path):
+    import ingest
+    from feed_ingestor import CsvTailer
+
+    store = AdDataStore(str(tmp_path / "ad_data.db"))
+    csv_path = str(tmp_path / "delivery_data.csv")
+    header = "EventDate,EventHour,GeoCode,Deliveries\n"
+    with open(csv_path, "w") as f:
+        f.write(header + "2024-01-01,2024-01-01 00,US,1\n")
+    ingest.ingest_once(store, {"deliveries": CsvTailer(csv_path, *store.get_position(csv_path))}, chunk_bytes=1 << 20)
+
+    # Appended rows are picked up after a restart
+    with open(csv_path, "a") as f:
+        f.write("2024-01-01,2024-01-01 01,US,2\n")
+    ingest.ingest_once(store, {"deliveries": CsvTailer(csv_path, *store.get_position(csv_path))}, chunk_bytes=1 << 20)
+    assert store.load("deliveries")["Deliveries"].sum() == 3
+
+    # A rotated file longer than the recorded offset is ingested whole
+    rotated = str(tmp_path / "rotated.csv")
+    with open(rotated, "w") as f:
+        f.write(header + "".join(f"2024-01-02,2024-01-02 {hour:02d},US,10\n" for hour in range(3)))
+    os.replace(rotated, csv_path)
+    ingest.ingest_once(store, {"deliveries": CsvTailer(csv_path, *store.get_position(csv_path))}, chunk_bytes=1 << 20)
+    assert store.load("deliveries")["Deliveries"].sum() == 33
+
+def test_versions_change_only_for_the_kind_stored(tmp_path):
+    store = AdDataStore(str(tmp_path / "ad_data.db"))
+    store.store_rows("deliveries", deliveries(days=1))
+    before = store.get_versions()
+    store.store_rows("deliveries", deliveries(days=1))
+    after = store.get_versions()
+    assert after["deliveries"] != before["deliveries"]
+    assert "publishers" not in after
+
+def test_store_tailer_returns_only_rows_stored_after_the_load(tmp_path):
+    store = AdDataStore(str(tmp_path / "ad_data.db"))
+    store.store_rows("deliveries", deliveries(days=2))
+    rows, seq = store.load_live("deliveries")
+    feed = HourlyFeed("Deliveries", rows)
+    tailer = StoreTailer(store, "deliveries", seq)
+    assert tailer.poll() is None
+
+    later = deliveries(days=3).tail(24)
+    store.store_rows("deliveries", later)
+    ingestor = FeedIngestor()
+    ingestor.add_source(tailer, None, feed)
+    assert ingestor.poll_once() == 24
+    assert ingestor.poll_once() == 0
+
+    alpha_3, values = feed.snapshot().rollups.query(pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-04"))
+    assert list(alpha_3) == ["USA"]
+    assert values.sum() == 3 * 24
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from feed_ingestor import CsvTailer, DropDirectoryTailer
+
+HEADER = "GeoCode,Deliveries\n"
+
+def write(path, text, mode="w"):
+    with open(path, mode) as f:
+        f.write(text)
+
+def rows(df):
+    return list(df.itertuples(index=False, name=None)) if df is not None else None
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "deliveries.csv")
+    write(path, HEADER + "US,1\nDE,2\n")
+    return path
+
+def test_returns_appended_rows_once(csv_path):
+    tailer = CsvTailer(csv_path)
+    assert rows(tailer.poll()) == [("US", 1), ("DE", 2)]
+    assert tailer.poll() is None
+    write(csv_path, "FR,3\n", "a")
+    assert rows(tailer.poll()) == [("FR", 3)]
+
+def test_partial_line_waits_for_its_newline(csv_path):
+    tailer = CsvTailer(csv_path)
+    tailer.poll()
+    write(csv_path, "FR,3\nJP,", "a")
+    assert rows(tailer.poll()) == [("FR", 3)]
+    assert tailer.poll() is None
+    write(csv_path, "4\n", "a")
+    assert rows(tailer.poll()) == [("JP", 4)]
+
+def test_header_is_recovered_when_resuming_at_an_offset(csv_path):
+    first = CsvTailer(csv_path)
+    first.poll()
+    write(csv_path, "FR,3\n", "a")
+
+    resumed = CsvTailer(csv_path, offset=first.offset)
+    df = resumed.poll()
+    assert list(df.columns) == ["GeoCode", "Deliveries"]
+    assert rows(df) == [("FR", 3)]
+
+def test_chunks_never_split_a_row(csv_path):
+    tailer = CsvTailer(csv_path)
+    polled = []
+    while (df := tailer.poll(max_bytes=len(HEADER) + 6)) is not None:
+        polled += rows(df)
+    assert polled == [("US", 1), ("DE", 2)]
+
+def test_truncated_file_is_read_from_the_start(csv_path):
+    tailer = CsvTailer(csv_path)
+    tailer.poll()
+    write(csv_path, HEADER + "JP,9\n")
+    assert rows(tailer.poll()) == [("JP", 9)]
+
+def test_replaced_file_is_read_from_the_start(csv_path, tmp_path):
+    tailer = CsvTailer(csv_path)
+    tailer.poll()
+    # The new file is longer than the offset reached in the old one
+    rotated = str(tmp_path / "rotated.csv")
+    write(rotated, HEADER + "US,7\nDE,8\nFR,9\n")
+    os.replace(rotated, csv_path)
+    assert rows(tailer.poll()) == [("US", 7), ("DE", 8), ("FR", 9)]
+
+def test_missing_file_has_no_rows(tmp_path):
+    assert CsvTailer(str(tmp_path / "missing.csv")).poll() is None
+
+def test_drop_directory_returns_each_complete_file_once(tmp_path):
+    tailer = DropDirectoryTailer(str(tmp_path))
+    write(str(tmp_path / "a.csv"), HEADER + "US,1\n")
+    write(str(tmp_path / "b.csv.tmp"), HEADER + "DE,2\n")
+    assert rows(tailer.poll()) == [("US", 1)]
+    assert tailer.poll() is None
+
+    os.replace(str(tmp_path / "b.csv.tmp"), str(tmp_path / "b.csv"))
+    assert rows(tailer.poll()) == [("DE", 2)]
+
+def test_drop_directory_skips_malformed_files_until_they_change(tmp_path):
+    tailer = DropDirectoryTailer(str(tmp_path))
+    bad = str(tmp_path / "bad.csv")
+    write(bad, HEADER + "US,1\nFR,3,extra,fields\n")
+    write(str(tmp_path / "good.csv"), HEADER + "DE,2\n")
+    assert rows(tailer.poll()) == [("DE", 2)]
+    assert tailer.poll() is None
+
+    write(bad, HEADER + "US,1\n")
+    assert rows(tailer.poll()) == [("US", 1)]
+
+def test_missing_drop_directory_has_no_rows(tmp_path):
+    assert DropDirectoryTailer(str(tmp_path / "missing")).poll() is None
+
+def test_resumes_at_the_offset_of_the_same_file(csv_path):
+    first = CsvTailer(csv_path)
+    first.poll()
+    write(csv_path, "FR,3\n", "a")
+
+    resumed = CsvTailer(csv_path, offset=first.offset, identity=first.identity)
+    assert rows(resumed.poll()) == [("FR", 3)]
+
+def test_resume_in_a_different_file_starts_over(csv_path, tmp_path):
+    first = CsvTailer(csv_path)
+    first.poll()
+    rotated = str(tmp_path / "rotated.csv")
+    write(rotated, HEADER + "US,7\nDE,8\nFR,9\n")
+    os.replace(rotated, csv_path)
+
+    resumed = CsvTailer(csv_path, offset=first.offset, identity=first.identity)
+    assert rows(resumed.poll()) == [("US", 7), ("DE", 8), ("FR", 9)]
@@ -0,0 +1,80 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+
+import pytest
+
+from icon_cache import IconCache
+
+# A 1x1 PNG, so the icon is a valid image whether or not Pillow resizes it
+PNG = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR4nGP4z8DwHwAFAAH/iZk9HQAAAABJRU5ErkJggg==")
+ICON_URL = "https://cdn.example.com/app/icon.png"
+
+class StubOrigin:
+    """Stands in for the icon CDN and counts the fetches."""
+    def __init__(self):
+        self.fetched = []
+
+    def __call__(self, url):
+        self.fetched.append(url)
+        # Slow enough for concurrent requests to overlap
+        time.sleep(0.05)
+        return PNG, "image/png"
+
+@pytest.fixture
+def origin():
+    return StubOrigin()
+
+@pytest.fixture
+def client(launch, origin, tmp_path, monkeypatch):
+    monkeypatch.setattr(launch, "icon_cache", IconCache(str(tmp_path / "icons"), fetch=origin))
+    return launch.dash_app.server.test_client()
+
+def test_icon_is_fetched_once_and_cached_immutably(launch, client, origin):
+    src = launch.icon_cache.src(ICON_URL)
+
+    first = client.get(src)
+    assert first.status_code == 200
+    assert first.mimetype == "image/png"
+    etag, _ = first.get_etag()
+    assert etag
+    assert "immutable" in first.headers["Cache-Control"]
+    assert "max-age=31536000" in first.headers["Cache-Control"]
+
+    second = client.get(src)
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert origin.fetched == [ICON_URL]
+
+def test_matching_etag_is_not_modified(launch, client, origin):
+    src = launch.icon_cache.src(ICON_URL)
+    etag, _ = client.get(src).get_etag()
+
+    response = client.get(src, headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert origin.fetched == [ICON_URL]
+
+def test_unregistered_key_is_not_found(client, origin):
+    response = client.get(f"/icons/{IconCache.key(ICON_URL)}")
+    assert response.status_code == 404
+    assert origin.fetched == []
+
+def test_concurrent_requests_fetch_the_icon_once(origin, tmp_path):
+    cache = IconCache(str(tmp_path / "icons"), fetch=origin)
+    key = cache.src(ICON_URL).rsplit("/", 1)[-1]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.get(key), range(8)))
+    assert origin.fetched == [ICON_URL]
+    assert all(result == results[0] for result in results)
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")]
+
+def test_malformed_key_is_not_found(launch, client, origin):
+    key = IconCache.key(ICON_URL)
+    launch.icon_cache.src(ICON_URL)
+    assert client.get(f"/icons/{key}").status_code == 200
+
+    assert client.get(f"/icons/{key.upper()}").status_code == 404
+    assert launch.icon_cache.get(f"../urls/{key}") is None
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ad_data import compact_hourly_data
+from feed_ingestor import HourlyFeed
+from rollups import RESOLUTIONS, Rollups
+
+START = pd.Timestamp("2024-01-01")
+
+def hourly(hours, countries, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = pd.MultiIndex.from_product([hours, countries], names=["EventHour", "alpha_3"]).to_frame(index=False)
+    rows["EventDate"] = rows["EventHour"].dt.strftime("%Y-%m-%d")
+    rows["GeoCode"] = rows["alpha_3"].str[:2]
+    rows["Deliveries"] = rng.integers(0, 300, len(rows))
+    return rows
+
+def assert_same(rollups, expected):
+    assert set(rollups.countries) == set(expected.countries)
+    order = pd.Index(rollups.countries).get_indexer(expected.countries)
+    for resolution in RESOLUTIONS:
+        level, want = rollups.levels[resolution], expected.levels[resolution]
+        np.testing.assert_array_equal(level.buckets, want.buckets)
+        np.testing.assert_array_equal(level.cumulative[:, order], want.cumulative)
+        assert level.max_value == want.max_value
+
+@pytest.mark.parametrize("new_hours, new_countries", [
+    # The next hour of a live feed
+    (pd.date_range(START + pd.Timedelta(days=20), periods=1, freq="h"), ["USA", "DEU"]),
+    # Late rows for hours already loaded, next to a country seen for the first time
+    (pd.date_range(START + pd.Timedelta(days=3), periods=30, freq="h"), ["DEU", "JPN"]),
+    # Hours before, between and after the loaded ones
+    (pd.DatetimeIndex([START - pd.Timedelta(days=9), START + pd.Timedelta(days=12, hours=5), START + pd.Timedelta(days=40)]), ["FRA"]),
+])
+def test_extended_matches_a_rebuild(new_hours, new_countries):
+    loaded = pd.concat([hourly(pd.date_range(START, periods=10 * 24, freq="h"), ["USA", "DEU", "FRA"]),
+                        hourly(pd.date_range(START + pd.Timedelta(days=15), periods=5 * 24, freq="h"), ["USA"], seed=1)])
+    rows = hourly(new_hours, new_countries, seed=2)
+
+    extended = Rollups(compact_hourly_data(loaded, "Deliveries"), "Deliveries").extended(compact_hourly_data(rows, "Deliveries"))
+    rebuilt = Rollups(compact_hourly_data(pd.concat([loaded, rows]), "Deliveries"), "Deliveries")
+    assert_same(extended, rebuilt)
+
+def test_feed_extends_from_empty():
+    feed = HourlyFeed("Deliveries", hourly(pd.DatetimeIndex([]), ["USA"]))
+    rows = hourly(pd.date_range(START, periods=3, freq="h"), ["USA", "DEU"])
+    before = feed.snapshot()
+    feed.extend(rows)
+
+    assert len(before.rollups) == 0
+    assert_same(feed.snapshot().rollups, Rollups(compact_hourly_data(rows, "Deliveries"), "Deliveries"))
+
+def test_query_matches_brute_force():
+    data = hourly(pd.date_range(START, periods=30 * 24, freq="h"), ["USA", "DEU", "FRA"])
+    rollups = Rollups(compact_hourly_data(data, "Deliveries"), "Deliveries")
+    for start, end in [(START + pd.Timedelta(hours=5), START + pd.Timedelta(days=17, hours=3)),
+                       (START + pd.Timedelta(days=2), START + pd.Timedelta(days=3)),
+                       (START - pd.Timedelta(days=3), START + pd.Timedelta(days=40))]:
+        alpha_3, totals = rollups.query(start, end)
+        window = data[(data["EventHour"] >= start) & (data["EventHour"] < end)]
+        expected = window.groupby("alpha_3")["Deliveries"].sum()
+        expected = expected[expected > 0]
+        assert dict(zip(alpha_3.tolist(), totals.tolist())) == expected.to_dict()
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database_manager import DatabaseManager
+from startup_loader import StartupLoader, receive, share
+
+def frame(rows):
+    return pd.DataFrame({"alpha_3": pd.Categorical(["USA", "DEU"] * rows), "Count": np.arange(2 * rows, dtype=np.uint32)})
+
+def test_shared_results_round_trip():
+    data = frame(1000)
+    pd.testing.assert_frame_equal(receive(share(data)), data)
+    assert receive(share({"apps": ["a", "b"]})) == {"apps": ["a", "b"]}
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_tasks_get_the_results_they_depend_on(workers):
+    loader = StartupLoader(workers)
+    loader.add("data", frame, 10)
+    loader.add("total", lambda offset, data: int(data["Count"].sum()) + offset, 1, after=("data",))
+    loader.add("pid", os.getpid)
+    results = loader.run()
+
+    pd.testing.assert_frame_equal(results["data"], frame(10))
+    assert results["total"] == sum(range(20)) + 1
+    assert (results["pid"] != os.getpid()) == (workers > 1)
+
+def test_circular_dependencies_are_rejected():
+    loader = StartupLoader(1)
+    loader.add("a", lambda b: b, after=("b",))
+    loader.add("b", lambda a: a, after=("a",))
+    with pytest.raises(ValueError):
+        loader.run()
+
+def test_forked_tasks_open_their_own_db_connection(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "apps.db"))
+    db_manager.get_data_version()
+    inherited = db_manager._local.conn
+
+    def query():
+        db_manager.get_data_version()
+        return os.getpid(), db_manager._local.conn is inherited
+
+    loader = StartupLoader(2)
+    loader.add("a", query)
+    loader.add("b", query)
+    for pid, used_inherited in loader.run().values():
+        assert pid != os.getpid()
+        assert not used_inherited
+    assert db_manager._local.conn is inherited
@@ -0,0 +1,138 @@
+import time
+
+import pytest
+
+from app_entry import AppEntry
+from config import Config
+from database_manager import DatabaseManager
+import util
+
+JOB_DATE = "2024-01-01"
+
+class StubChartService:
+    """Stands in for ChartService, failing the charts of the given territories."""
+    def __init__(self, db_manager, failing=()):
+        self.db_manager = db_manager
+        self.failing = set(failing)
+        self.calls = []
+
+    def update_chart_data(self, territory, chart_type):
+        self.calls.append((territory, chart_type))
+        if territory in self.failing:
+            raise RuntimeError(f"{territory} is unavailable")
+        return False
+
+@pytest.fixture
+def db_manager(tmp_path):
+    return DatabaseManager(str(tmp_path / "apps.db"))
+
+@pytest.fixture
+def territories(monkeypatch):
+    monkeypatch.setattr(Config, "TERRITORIES", ["de", "fr", "jp", "us"])
+    monkeypatch.setattr(Config, "CHART_TYPES", ["top-free"])
+    return Config.TERRITORIES
+
+def test_claim_hands_out_each_job_once(db_manager):
+    db_manager.create_update_jobs(JOB_DATE, [("de", "top-free"), ("fr", "top-free")])
+    assert db_manager.claim_update_job(JOB_DATE, "a", lease_seconds=60) == ("de", "top-free")
+    assert db_manager.claim_update_job(JOB_DATE, "b", lease_seconds=60) == ("fr", "top-free")
+    assert db_manager.claim_update_job(JOB_DATE, "c", lease_seconds=60) is None
+
+def test_expired_lease_is_claimed_again(db_manager):
+    db_manager.create_update_jobs(JOB_DATE, [("de", "top-free")])
+    assert db_manager.claim_update_job(JOB_DATE, "dead", lease_seconds=-1) == ("de", "top-free")
+    assert db_manager.claim_update_job(JOB_DATE, "alive", lease_seconds=60) == ("de", "top-free")
+
+    # The worker that lost its lease can't overwrite the outcome
+    db_manager.finish_update_job(JOB_DATE, "de", "top-free", "dead", succeeded=False)
+    assert db_manager.get_update_progress(JOB_DATE) == {"running": 1}
+    db_manager.finish_update_job(JOB_DATE, "de", "top-free", "alive", succeeded=True)
+    assert db_manager.get_update_progress(JOB_DATE) == {"done": 1}
+
+def test_expired_lease_on_last_attempt_fails(db_manager):
+    db_manager.create_update_jobs(JOB_DATE, [("de", "top-free")])
+    for _ in range(3):
+        assert db_manager.claim_update_job(JOB_DATE, "dead", lease_seconds=-1) == ("de", "top-free")
+    assert db_manager.claim_update_job(JOB_DATE, "alive", lease_seconds=60) is None
+    assert db_manager.get_update_progress(JOB_DATE) == {"failed": 1}
+
+def test_failed_job_waits_before_retry(db_manager):
+    db_manager.create_update_jobs(JOB_DATE, [("de", "top-free")])
+    db_manager.claim_update_job(JOB_DATE, "a", lease_seconds=60)
+    before = time.time()
+    db_manager.finish_update_job(JOB_DATE, "de", "top-free", "a", succeeded=False, retry_seconds=30)
+
+    assert db_manager.claim_update_job(JOB_DATE, "a", lease_seconds=60) is None
+    assert db_manager.next_update_retry(JOB_DATE) >= before + 30
+    assert db_manager.get_update_progress(JOB_DATE) == {"pending": 1}
+
+def test_failed_jobs_are_retried_by_the_next_run(db_manager, territories, monkeypatch):
+    monkeypatch.setattr(util.time, "sleep", lambda seconds: None)
+    failing = StubChartService(db_manager, failing={"fr", "jp"})
+    job_date = util.create_update_jobs(db_manager)
+    util.update_all_charts(failing, worker_id="first", job_date=job_date, retry_seconds=0)
+    # Two good charts once each, two failing charts three attempts each
+    assert len(failing.calls) == 2 + 2 * 3
+    assert db_manager.get_update_progress(job_date) == {"done": 2, "failed": 2}
+
+    assert util.create_update_jobs(db_manager) == job_date
+    assert db_manager.get_update_progress(job_date) == {"done": 2, "pending": 2}
+    healthy = StubChartService(db_manager)
+    util.update_all_charts(healthy, worker_id="second", job_date=job_date)
+    assert sorted(healthy.calls) == [("fr", "top-free"), ("jp", "top-free")]
+    assert db_manager.get_update_progress(job_date) == {"done": 4}
+
+def test_killed_run_resumes_where_it_stopped(db_manager, territories):
+    job_date = util.create_update_jobs(db_manager)
+    for _ in range(2):
+        territory, chart_type = db_manager.claim_update_job(job_date, "killed", lease_seconds=60)
+        db_manager.finish_update_job(job_date, territory, chart_type, "killed", succeeded=True)
+
+    resumed = StubChartService(db_manager)
+    util.update_all_charts(resumed, worker_id="resumed", job_date=job_date)
+    assert sorted(resumed.calls) == [("jp", "top-free"), ("us", "top-free")]
+
+def test_retries_wait_out_their_delay(db_manager, territories, monkeypatch):
+    clock = [1000.0]
+    slept = []
+    def sleep(seconds):
+        slept.append(seconds)
+        clock[0] += seconds
+    monkeypatch.setattr(util.time, "time", lambda: clock[0])
+    monkeypatch.setattr(util.time, "sleep", sleep)
+
+    service = StubChartService(db_manager, failing={"us"})
+    util.update_all_charts(service, worker_id="a", job_date=util.create_update_jobs(db_manager), retry_seconds=5)
+    assert service.calls.count(("us", "top-free")) == 3
+    # The delay grows with the attempts made: 5s after the first failure, 10s after the second
+    assert slept == [5.0, 10.0]
+
+def store_chart(db_manager, country, fetched_date, app_name):
+    db_manager.store_apps([AppEntry(rank=1, app_name=app_name, artist="", icon_url="", fetched_date=fetched_date,
+                                    country=country, chart_type="top-free")])
+
+def test_day_is_published_once_no_job_is_left_running(db_manager):
+    store_chart(db_manager, "de", "2023-12-31", "Old")
+    db_manager.create_update_jobs(JOB_DATE, [("de", "top-free"), ("fr", "top-free")])
+    assert db_manager.publish_update("2023-12-31")
+    published = db_manager.get_published_version()
+
+    for country in ("de", "fr"):
+        assert db_manager.claim_update_job(JOB_DATE, country, lease_seconds=60) == (country, "top-free")
+        store_chart(db_manager, country, JOB_DATE, "New")
+    db_manager.finish_update_job(JOB_DATE, "de", "top-free", "de", succeeded=True)
+
+    # The half-written day is neither announced nor served
+    assert not db_manager.publish_update(JOB_DATE)
+    assert db_manager.get_published_version() == published
+    assert db_manager.fetch_apps_name_from_all_countries("top-free") == ["Old"]
+
+    db_manager.finish_update_job(JOB_DATE, "fr", "top-free", "fr", succeeded=False, max_attempts=1)
+    assert db_manager.publish_update(JOB_DATE)
+    assert db_manager.get_published_version() != published
+    assert db_manager.fetch_apps_name_from_all_countries("top-free") == ["New"]
+
+    # Publishing again without new data changes nothing
+    published = db_manager.get_published_version()
+    assert db_manager.publish_update(JOB_DATE)
+    assert db_manager.get_published_version() == published
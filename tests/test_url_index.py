@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from ad_data import compact_url_data
+from url_index import UrlIndex
+
+def url_data():
+    return compact_url_data(pd.DataFrame({
+        "EventDate": ["2024-01-01", "2024-01-02", "2024-01-01", "2024-01-01", "2024-01-02"],
+        "PublisherURL": ["a.com", "a.com", "a.com", "b.com", "b.com"],
+        "alpha_3": ["USA", "USA", "DEU", "FRA", None],
+        "Count": [200, 100, 5, 250, 7],
+    }), "PublisherURL")
+
+def test_lookup_sums_counts_per_country():
+    index = UrlIndex(url_data(), "PublisherURL")
+    alpha_3, counts = index.lookup("a.com")
+    assert dict(zip(alpha_3.tolist(), counts.tolist())) == {"DEU": 5, "USA": 300}
+    assert index.lookup("c.com") is None
+
+def test_urls_are_ranked_by_total_without_overflow():
+    # Counts fit in uint8, their totals don't
+    index = UrlIndex(url_data(), "PublisherURL")
+    assert index.search() == ([("a.com", 305), ("b.com", 250)], 1)
+    assert [index.url_at(rank) for rank in range(len(index))] == ["a.com", "b.com"]
+
+def test_index_holds_compact_arrays():
+    rows = 10_000
+    rng = np.random.default_rng(0)
+    data = compact_url_data(pd.DataFrame({
+        "EventDate": "2024-01-01",
+        "PublisherURL": [f"https://publisher{i}.example.com" for i in rng.integers(0, 100, rows)],
+        "alpha_3": rng.choice(["USA", "DEU", "FRA", "JPN"], rows),
+        "Count": rng.integers(1, 50, rows),
+    }), "PublisherURL")
+    index = UrlIndex(data, "PublisherURL")
+    _, counts = index.lookup(index.url_at(0))
+    assert counts.dtype.itemsize <= 2
+    assert 0 < index.nbytes < data.memory_usage(deep=True).sum()